@@ -24,55 +24,98 @@
 """
 
 import csv
+import io
+import itertools
 import json
+import logging
 import sqlite3
 import os
 import sys
-import argparse
 import re
 import time
-import hashlib
 import math
+import operator
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
 from enum import Enum
+from functools import lru_cache
 from typing import Optional, Dict, List, Tuple, Any
 
+# ── 路徑 (模組載入時解析一次) ─────────────────────────────────────────────────
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+_PROJECT_DIR = os.path.dirname(_SCRIPT_DIR)
+_DB_DIR = os.path.join(_PROJECT_DIR, 'db')
+_DEFAULT_TARGET = os.path.join(_DB_DIR, 'land_data.db')
+_DEFAULT_CSV = os.path.join(_DB_DIR, 'ALL_lvr_land_a.csv')
+_DEFAULT_API = os.path.join(_DB_DIR, 'transactions_all_original.db')
+
 # ── 共用模組 ──────────────────────────────────────────────────────────────────
-sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+if _PROJECT_DIR not in sys.path:
+    sys.path.insert(0, _PROJECT_DIR)
 
 # 全域 verbose 旗標 (由 main() 設定)
 _VERBOSE = False
 _VERBOSE_MAX = float('inf')  # 不限制：所有範例都印出並寫入 log
 
-# 日誌檔案句柄與函式
-_LOG_FILE = None
+# 解析 worker 行程數 (由 convert_v4 的 jobs 參數設定；None = CPU 核心數)
+_PARSE_JOBS: Optional[int] = None
+
+# 日誌: 統一經由 logger 輸出 (stdout + 匯入日誌檔)，批次執行時可調整等級靜音
+logger = logging.getLogger('land_convert')
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """每次輸出時取用當下的 sys.stdout (相容重導向/測試擷取)"""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+if not logger.handlers:
+    _stdout_handler = _StdoutHandler()
+    _stdout_handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_stdout_handler)
+
+_LOG_HANDLER: Optional[logging.Handler] = None
 
 def log_print(*args, **kwargs):
-    """同時輸出到 stdout 和日誌檔案"""
-    msg = ' '.join(str(a) for a in args)
-    print(*args, **kwargs)
-    if _LOG_FILE:
-        print(msg, file=_LOG_FILE, flush=True)
+    """同時輸出到 stdout 和日誌檔案 (kwargs 為相容 print 呼叫，忽略)"""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(' '.join(str(a) for a in args))
 
 def init_logging(log_path: str):
     """初始化日誌檔案"""
-    global _LOG_FILE
+    global _LOG_HANDLER
+    close_logging(quiet=True)
     try:
-        _LOG_FILE = open(log_path, 'w', encoding='utf-8', buffering=1)
+        _LOG_HANDLER = logging.FileHandler(log_path, mode='w', encoding='utf-8')
+        _LOG_HANDLER.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(_LOG_HANDLER)
         log_print(f'[{time.strftime("%Y-%m-%d %H:%M:%S")}] 開始匯入')
     except Exception as e:
         print(f'⚠️ 無法開啟日誌檔案: {e}', flush=True)
-        _LOG_FILE = None
+        _LOG_HANDLER = None
 
-def close_logging():
+def close_logging(quiet: bool = False):
     """關閉日誌檔案"""
-    global _LOG_FILE
-    if _LOG_FILE:
-        log_print(f'[{time.strftime("%Y-%m-%d %H:%M:%S")}] 匯入完成')
-        _LOG_FILE.close()
-        _LOG_FILE = None
+    global _LOG_HANDLER
+    if _LOG_HANDLER:
+        if not quiet:
+            log_print(f'[{time.strftime("%Y-%m-%d %H:%M:%S")}] 匯入完成')
+        logger.removeHandler(_LOG_HANDLER)
+        _LOG_HANDLER.close()
+        _LOG_HANDLER = None
 
 from address_utils import (
     normalize_address,
+    normalize_addresses,
     parse_address,
     chinese_numeral_to_int,
     fullwidth_to_halfwidth,
@@ -84,6 +127,10 @@ from address_utils import (
 # 向後相容別名 (供 test_convert.py 等使用)
 normalize_address_numbers = normalize_address
 
+# 實價登錄同一建物不同戶的地址大量重複 → 解析結果以 LRU 快取，
+# 正則解析只需做「相異地址數」次。回傳的 dict 為快取共用物件，本模組只讀不改。
+parse_address = lru_cache(maxsize=1 << 17)(parse_address)
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # 第一層: 安全型別轉換
@@ -107,24 +154,27 @@ def safe_int(val, default=None):
 def safe_float(val, default=None):
     if val is None or val == '':
         return default
-    if isinstance(val, (int, float)):
-        f = float(val)
-        return default if math.isnan(f) or math.isinf(f) else f
     try:
+        # float() 直接接受 int/float/數字字串，不需先做型別判斷
         f = float(val)
-        return default if math.isnan(f) or math.isinf(f) else f
     except (ValueError, TypeError):
         try:
             f = float(str(val).replace(',', ''))
-            return default if math.isnan(f) or math.isinf(f) else f
         except (ValueError, TypeError):
             return default
+    return f if math.isfinite(f) else default
 
 
 def parse_price(val):
     """'39,380,000' → int"""
     if not val:
         return None
+    if type(val) is str:
+        try:
+            # 快速路徑: 無千分位逗號的純數字字串
+            return int(val)
+        except ValueError:
+            pass
     try:
         return int(str(val).replace(',', '').replace(' ', ''))
     except Exception:
@@ -175,7 +225,8 @@ def detect_source(filepath: str) -> SourceType:
 def _detect_csv_type(filepath: str) -> SourceType:
     """偵測 CSV 子類型"""
     try:
-        with open(filepath, 'r', encoding='utf-8-sig') as f:
+        # 與匯入相同的開檔方式 (大緩衝 + 循序預讀)，偵測時即開始預熱後續匯入要讀的頁
+        with _open_csv(filepath) as f:
             first_line = f.readline().strip()
     except Exception:
         return SourceType.UNKNOWN
@@ -231,8 +282,12 @@ CHINESE_FLOOR = {
 }
 
 
+@lru_cache(maxsize=4096)
 def parse_floor_info(floor_str):
-    """解析樓層欄位: '九層/十五層' → ('9', '15'), 或 '九層' -> ('9', '')"""
+    """
+    解析樓層欄位: '九層/十五層' → ('9', '15'), 或 '九層' -> ('9', '')
+    樓層字串種類有限 (全檔僅數百種)，結果快取後每列只剩一次 dict 查詢。
+    """
     if not floor_str:
         return '', ''
     parts = floor_str.split('/')
@@ -268,26 +323,67 @@ def clean_trans_addr(addr_raw):
     return addr_raw or ''
 
 
+@lru_cache(maxsize=1 << 18)
 def norm_addr_simple(addr):
     """正規化地址用於去重: 全形→半形、臺→台、中文數字→阿拉伯、段名統一、去空白"""
     return normalize_address(addr or '').replace(' ', '')
 
 
+# 縣市前綴 (現行縣市 + 改制前舊縣名)，依比對順序一次建好
+_CITY_STRIP_PREFIXES = tuple(CITY_CODE_MAP.values()) + (
+    '台北縣', '桃園縣', '台中縣', '台南縣', '高雄縣')
+_FLOOR_RE = re.compile(r'(?:-\d+|地下\d+|\d+)[樓Ff][之\d]*$')
+
+
+@lru_cache(maxsize=1 << 18)
 def strip_city(addr):
     """移除地址開頭的縣市名"""
-    for city in CITY_CODE_MAP.values():
-        if addr.startswith(city):
-            return addr[len(city):]
-    for old in ('台北縣', '桃園縣', '台中縣', '台南縣', '高雄縣'):
-        if addr.startswith(old):
-            return addr[len(old):]
+    if addr.startswith(_CITY_STRIP_PREFIXES):
+        for city in _CITY_STRIP_PREFIXES:
+            if addr.startswith(city):
+                return addr[len(city):]
     return addr
 
 
+@lru_cache(maxsize=1 << 18)
 def strip_floor(addr):
     """去除尾端樓層資訊，取得建物基礎地址"""
-    addr = re.sub(r'(-\d+|地下\d+|\d+)[樓Ff][之\d]*$', '', addr)
-    return addr.rstrip('之号號 ')
+    return _FLOOR_RE.sub('', addr).rstrip('之号號 ')
+
+
+_DATE_PREFIX_CACHE: Dict[str, str] = {}
+
+
+def dedup_date_part(date_str: str) -> str:
+    """
+    交易日期 → 去重鍵的日期段 (去 '/' 後前 7 碼)。
+    不同日期值僅數千種 → 以 dict 快取，每列省去 replace + slice 兩次字串配置，
+    且同日期的列共用同一個字串物件。
+    """
+    d = _DATE_PREFIX_CACHE.get(date_str)
+    if d is None:
+        d = _DATE_PREFIX_CACHE[date_str] = date_str.replace('/', '')[:7]
+    return d
+
+
+def make_dedup_key(d: str, addr: str, price: int,
+                   addr_norm: Optional[str] = None) -> Optional[str]:
+    """
+    三鍵去重鍵: 交易年月 (d = 去 '/' 後日期前 7 碼) | 去縣市正規化地址 | 總價 (int)。
+    addr_norm 為已算好的 norm_addr_simple(addr) (整欄批次正規化時傳入)。
+    地址無法正規化時回傳 None (該筆不做去重)。
+    """
+    if addr_norm is None:
+        addr_norm = norm_addr_simple(addr) if addr else ''
+    addr_norm = strip_city(addr_norm) if addr_norm else ''
+    if not addr_norm:
+        return None
+    return f"{d}|{addr_norm}|{price}"
+
+
+def community_addr_key(addr):
+    """社區回填比對鍵: 去縣市 + 去樓層 + 半形正規化"""
+    return strip_floor(strip_city(norm_addr_simple(addr or '')))
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -352,14 +448,101 @@ ENRICH_FIELDS = [
     ('elevator',         _EMPTY_TEXT),
 ]
 
+# record dict → LAND_COLUMNS 順序的 tuple (fast_insert_tuples 的輸入即為此順序 + dedup_key)
+_COL_GETTER = operator.itemgetter(*LAND_COLUMNS)
+
+
+def _record_values(rec: dict) -> tuple:
+    """依 LAND_COLUMNS 順序取出欄位值；parser 產生的 record 欄位齊全時走 C 層 itemgetter"""
+    try:
+        return _COL_GETTER(rec)
+    except KeyError:
+        # 欄位不齊 (例如舊版 land_data.db 來源) → 缺欄補 None
+        return tuple(rec.get(col) for col in LAND_COLUMNS)
+
+
+# enrich 讀取既有值的 SQL，及各 enrich 欄位在 LAND_COLUMNS tuple 內的位置
+# (tuple 路徑直接以位置取值，不必先轉成 dict)
+ENRICH_SELECT_SQL = (
+    'SELECT ' + ', '.join(col for col, _ in ENRICH_FIELDS)
+    + ' FROM land_transaction WHERE id = ?'
+)
+_ENRICH_TUPLE_IDX = tuple(LAND_COLUMNS.index(col) for col, _ in ENRICH_FIELDS)
+# 批次確認 bloom hit: 一次以 IN (...) 取回 dedup_key → (id, enrich 欄位...)
+ENRICH_LOOKUP_SQL = (
+    'SELECT dedup_key, id, ' + ', '.join(col for col, _ in ENRICH_FIELDS)
+    + ' FROM land_transaction WHERE dedup_key IN ({})'
+)
+# enrich 批次套用: 整批補充值編成一個 JSON 陣列 ([id, 欄位值...] 依 _ENRICH_COLS 順序)，
+# 以 json_each 展開後單一 UPDATE ... FROM 套用 — 每次 flush 只跨一次 Python↔SQLite 邊界
+_ENRICH_COLS = tuple(col for col, _ in ENRICH_FIELDS)
+_ENRICH_COL_POS = {col: i for i, col in enumerate(_ENRICH_COLS)}
+# 暫存欄位非 NULL 才覆寫 (要補的欄位已在 _try_enrich 判定)
+ENRICH_APPLY_SQL = (
+    'UPDATE land_transaction SET '
+    + ', '.join(f'{c} = COALESCE(t.{c}, land_transaction.{c})' for c in _ENRICH_COLS)
+    + ' FROM (SELECT json_extract(value, \'$[0]\') AS id, '
+    + ', '.join(f"json_extract(value, '$[{i}]') AS {c}"
+                for i, c in enumerate(_ENRICH_COLS, 1))
+    + ' FROM json_each(?)) AS t WHERE land_transaction.id = t.id'
+)
+_LOOKUP_CHUNK = 1000  # 每次 IN 查詢的鍵數 (遠低於 SQLITE_MAX_VARIABLE_NUMBER)
+_BLOOM_MIN_ITEMS = 5_000_000  # bloom filter 預設容量 (既有資料較多時於 open() 放大)
+_BLOOM_FP_RATE = 0.001
+_VACUUM_FREE_RATIO = 0.10  # finalize 預設: freelist 佔總頁數達此比例才 VACUUM
+# SQLite sorter 輔助執行緒數 (PRAGMA threads；上限為編譯期 SQLITE_MAX_WORKER_THREADS=8)
+_SORTER_THREADS = min(os.cpu_count() or 1, 8)
+_STMT_CACHE_SIZE = 512  # sqlite3 prepared statement 快取數 (預設 128)
+
+# idx_dedup_key 為 UNIQUE (NULL 不受限): Python 端漏網的重複由 B-tree 直接忽略
 INSERT_DEDUP_SQL = (
-    'INSERT INTO land_transaction ('
+    'INSERT OR IGNORE INTO land_transaction ('
     + ', '.join(LAND_COLUMNS + ['dedup_key'])
     + ') VALUES ('
     + ', '.join(['?'] * (len(LAND_COLUMNS) + 1))
     + ')'
 )
 
+# —— 查詢用次要索引 (名稱, 欄位) ——
+# 匯入階段一律不存在 (新 DB 尚未建立；既有 DB 於 open() 時移除)，
+# 待所有資料寫入後由 finalize() 一次建立，避免逐列維護 B-tree。
+# idx_dedup_key 另行管理 (見 _ensure_dedup_index)，不在此列。
+SECONDARY_INDEXES = [
+    # 單欄索引 (district / street / number 單欄查詢由下方複合索引的前綴涵蓋)
+    ('idx_county_city', 'county_city'),
+    ('idx_floor', 'floor'),
+    ('idx_date', 'transaction_date'),
+    ('idx_price', 'total_price'),
+    ('idx_serial', 'serial_no'),
+    # 複合索引（加速查詢服務）
+    # 門牌查詢多為 street/number 等值 → 最具選擇性的 number 放最前
+    ('idx_addr_combo', 'number, street, lane, district, county_city'),
+    # community_name 開頭的兩個索引已涵蓋單欄 community_name 查詢
+    ('idx_community_address', 'community_name, address'),
+    # (street, lane, district) 等值查詢由此索引前綴涵蓋 (address_match 路段/巷弄層級)；
+    # 完整 5 欄供 com2address 同棟門牌展開 (5 欄全等值) 直接定位。
+    # 不可改為 WHERE number IS NOT NULL 的部分索引: 路段層級查詢無此條件，planner 無法採用
+    ('idx_search_numbers', 'street, lane, district, total_floors, build_date'),
+    ('idx_district_street_number', 'district, street, number'),
+    ('idx_community_district', 'community_name, district'),
+]
+
+# address_fts 斷詞器: unicode61 把連續中文視為單一 token，「信義路」查不到「台北市信義路五段」；
+# trigram 以三字元切分 → 任意 ≥3 字的子字串皆可 MATCH (需 SQLite 3.34+)。
+# 既有 address_fts 斷詞器不同時 finalize() 全量重建，既有 DB 下次匯入時即改用 trigram。
+FTS_TOKENIZER = 'trigram' if sqlite3.sqlite_version_info >= (3, 34, 0) else 'unicode61'
+
+# 已被上列複合索引前綴涵蓋而移除的索引: 增量匯入時不再由 _deferred_index 重建
+RETIRED_INDEXES = frozenset({
+    'idx_district',              # ⊂ idx_district_street_number
+    'idx_street',                # ⊂ idx_search_numbers
+    'idx_number',                # ⊂ idx_addr_combo
+    'idx_lane',                  # 無單獨以 lane 篩選的查詢 (lane 皆與 street 並用)
+    'idx_community',             # ⊂ idx_community_address / idx_community_district
+    'idx_street_lane_district',  # ⊂ idx_search_numbers
+    'idx_district_street_lane',  # 同一組等值欄位 ⊂ idx_search_numbers
+})
+
 
 class _BloomFilter:
     """Compact bloom filter for dedup key existence checking.
@@ -368,30 +551,79 @@ class _BloomFilter:
       - size ≈ 72M bits ≈ 9 MB
       - num_hashes ≈ 10
     Memory is O(1) regardless of item count (fixed-size bytearray).
+    size is rounded up to a power of two (2^27 bits = 16 MB for the defaults)
+    so bit positions are taken with `& mask` instead of `%`.
     """
-    __slots__ = ('size', 'num_hashes', 'bits')
+    __slots__ = ('size', 'mask', 'num_hashes', 'bits')
 
     def __init__(self, expected_items: int = 5_000_000, fp_rate: float = 0.001):
-        self.size = int(-expected_items * math.log(fp_rate) / (math.log(2) ** 2))
-        self.num_hashes = max(1, int((self.size / expected_items) * math.log(2)))
+        size = int(-expected_items * math.log(fp_rate) / (math.log(2) ** 2))
+        self.num_hashes = max(1, int((size / expected_items) * math.log(2)))
+        self.size = 1 << (size - 1).bit_length()
+        self.mask = self.size - 1
         self.bits = bytearray((self.size + 7) // 8)
 
     def _hashes(self, key: str):
-        h = hashlib.md5(key.encode('utf-8')).digest()
-        h1 = int.from_bytes(h[:8], 'little')
-        h2 = int.from_bytes(h[8:], 'little')
-        size = self.size
+        # Kirsch-Mitzenmacher 雙雜湊。以內建 hash() (SipHash，str 會快取結果) 取代 MD5:
+        # bloom 只存在於本行程記憶體 (每次由 DB 重建)，不需跨行程穩定的雜湊值。
+        # h2 由 tuple hash 對 h1 再混合一次，取奇數避免 h2 == 0 時所有探測落在同一位置。
+        # size 為 2 的冪 → 先以 mask 截短 h1/h2 (模 2^k 同餘)，探測運算維持在小整數範圍
+        mask = self.mask
+        h1 = hash(key) & mask
+        h2 = (hash((key, 1)) & mask) | 1
         for i in range(self.num_hashes):
-            yield (h1 + i * h2) % size
+            yield (h1 + i * h2) & mask
 
     def add(self, key: str):
         bits = self.bits
         for pos in self._hashes(key):
             bits[pos >> 3] |= (1 << (pos & 7))
 
+    def add_many(self, keys) -> int:
+        """批次加入 (雜湊與設位內聯於單一迴圈，省去逐鍵方法呼叫與 generator 開銷)，回傳筆數"""
+        bits = self.bits
+        mask = self.mask
+        probes = range(self.num_hashes)
+        n = 0
+        for key in keys:
+            h1 = hash(key) & mask
+            h2 = (hash((key, 1)) & mask) | 1
+            for i in probes:
+                pos = (h1 + i * h2) & mask
+                bits[pos >> 3] |= (1 << (pos & 7))
+            n += 1
+        return n
+
+    def check_and_add(self, key: str) -> bool:
+        """
+        測試並設定: key 可能已存在 → 回傳 True (不修改)；否則加入後回傳 False。
+        等同 `key in bf` 後再 `bf.add(key)`，但雜湊只算一次。
+        """
+        bits = self.bits
+        mask = self.mask
+        h1 = hash(key) & mask
+        h2 = (hash((key, 1)) & mask) | 1
+        positions = [(h1 + i * h2) & mask for i in range(self.num_hashes)]
+        for pos in positions:
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                break
+        else:
+            return True
+        for pos in positions:
+            bits[pos >> 3] |= (1 << (pos & 7))
+        return False
+
     def __contains__(self, key: str) -> bool:
+        # 內聯探測，遇到第一個未設定位元即返回 (新鍵通常 1~2 次探測就結束)
         bits = self.bits
-        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._hashes(key))
+        mask = self.mask
+        h1 = hash(key) & mask
+        h2 = (hash((key, 1)) & mask) | 1
+        for i in range(self.num_hashes):
+            pos = (h1 + i * h2) & mask
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
 
     def memory_mb(self) -> float:
         return len(self.bits) / 1024 / 1024
@@ -409,13 +641,29 @@ class LandDataDB:
         db.close()
     """
 
-    def __init__(self, db_path: str):
+    # 社區回填 Phase 2 每個分片的列數 (滿一個分片才啟動 worker Pool)
+    _BACKFILL_CHUNK = 50000
+
+    def __init__(self, db_path: str, pragmas: Optional[Dict[str, Any]] = None):
+        """
+        pragmas: 匯入階段 PRAGMA 覆寫 (None/缺鍵 = 預設值)
+            journal_mode   OFF/DELETE/TRUNCATE/PERSIST/MEMORY/WAL (預設: 重建 OFF、增量 WAL)
+            synchronous    OFF/NORMAL/FULL/EXTRA (預設 OFF)
+            cache_size_mb  頁快取 MB (預設 250)
+            mmap_size_mb   mmap 大小 MB，0 = 停用 (預設 1024)
+        """
         self.db_path = db_path
+        self._pragmas = dict(pragmas or {})
         self.conn: Optional[sqlite3.Connection] = None
-        self._bloom = _BloomFilter(expected_items=5_000_000, fp_rate=0.001)
-        self._batch_keys: set = set()  # 當前批次的 dedup_key (bounded to BATCH_SIZE)
+        self._bloom = _BloomFilter(expected_items=_BLOOM_MIN_ITEMS, fp_rate=_BLOOM_FP_RATE)
         self._insert_batch: list = []
         self._enrich_batch: list = []
+        self._pending_lookups: list = []  # upsert_record 的 bloom hit 候選 (dedup_key, rec)
+        self._dedup_indexed = False  # idx_dedup_key 是否已建立 (重建時延後，見 open())
+        self._finalized = False
+        self._single_txn = False  # 載入階段: 批次不各自提交 (見 commit()/bulk_load_mode())
+        self._journal_off = False  # 重建模式: 載入階段 journal_mode=OFF
+        self._rebuild = False
         self._init_stats()
         self.BATCH_SIZE = 50000
 
@@ -429,44 +677,158 @@ class LandDataDB:
         }
         self._verbose_count = {'discarded': 0, 'enriched': 0, 'duplicated': 0}
 
-    def open(self, rebuild=False, load_dedup=True):
+    def open(self, rebuild=False, load_dedup=True, presize_bytes: int = 0,
+             incoming_bytes: Optional[int] = None):
         """
         開啟 (或建立) land_data.db。
         rebuild=True 時會刪除舊 DB 重建。
         load_dedup=False 時跳過去重鍵載入（僅做 backfill 時使用）。
+        presize_bytes > 0 時，新建的 DB 先預配置約此大小的檔案空間。
+        incoming_bytes: 本次輸入檔總大小 (估算增量規模)；None = 未知，一律延後建索引。
+
+        重建/新 DB: 建表時只有 PK (與 idx_dedup_key)，所有次要索引在 finalize() 一次建立。
+        既有 DB: 增量量相對既有資料夠大 (見 _DEFER_INDEX_MIN_RATIO) 才暫移索引；
+        小量增量保留索引逐列維護，免得為幾千筆重建全部索引。
         """
         if rebuild and os.path.exists(self.db_path):
             os.remove(self.db_path)
             log_print(f'  🗑  已刪除舊資料庫: {self.db_path}')
 
         is_new = not os.path.exists(self.db_path)
-        self.conn = sqlite3.connect(self.db_path)
+        # 單一寫入者: 交易一開始即取得寫鎖 (BEGIN IMMEDIATE)，不再用 locking_mode=EXCLUSIVE —
+        # 載入期間其他唯讀工具仍可在 WAL 下讀取，checkpoint 也不會被獨佔鎖卡住。
+        # 匯入迴圈反覆執行同形 SQL (INSERT / IN 查詢各種 chunk 長度) → 加大 statement cache 免重複 prepare
+        self.conn = sqlite3.connect(self.db_path, isolation_level='IMMEDIATE',
+                                    cached_statements=_STMT_CACHE_SIZE)
         cur = self.conn.cursor()
 
-        # 批量匯入效能設定 (finalize 時會恢復)
-        cur.execute('PRAGMA journal_mode=WAL')
-        cur.execute('PRAGMA synchronous=OFF')        # 匯入期間關閉同步 (finalize 恢復)
-        cur.execute('PRAGMA cache_size=-256000')      # 256MB cache
-        cur.execute('PRAGMA temp_store=MEMORY')
-        cur.execute('PRAGMA locking_mode=EXCLUSIVE')  # 獨佔鎖定避免鎖開銷
-        cur.execute('PRAGMA page_size=8192')           # 較大頁面提升大表效能
+        cur.execute('PRAGMA page_size=8192')           # 較大頁面提升大表效能 (須在建表前)
+        if is_new:
+            # 新 DB 啟用 incremental auto_vacuum (須在建表前): finalize 可用 incremental_vacuum
+            # 歸還少量空頁，不必為此重寫整個檔案
+            cur.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        self._rebuild = bool(rebuild)
+        self._tune_for_bulk(cur)
 
         self._create_tables(cur)
-        cur.execute('CREATE INDEX IF NOT EXISTS idx_dedup_key ON land_transaction(dedup_key)')
+        # 重建時 idx_dedup_key 延後建立: 空表起步、去重由 bloom + 批次集合在 Python 端完成，
+        # 僅在第一次需要查 DB (bloom hit) 或 finalize() 時才一次建好索引
+        self._dedup_indexed = False
+        if not rebuild:
+            self._ensure_dedup_index(cur)
         self.conn.commit()
 
         if is_new:
             log_print(f'  ✨ 建立新資料庫: {self.db_path}')
+            if presize_bytes > 0:
+                self._presize(presize_bytes)
         else:
             count = cur.execute('SELECT COUNT(*) FROM land_transaction').fetchone()[0]
             log_print(f'  📂 開啟既有資料庫: {self.db_path} ({count:,} 筆)')
-            # 增量匯入時，先暫時移除非必要索引以加速寫入
-            self._drop_non_essential_indexes(cur)
+            # 既有筆數 + 同量新資料超過預設容量 → 放大 bloom，避免誤判率隨載入量飆升
+            if load_dedup and count * 2 > _BLOOM_MIN_ITEMS:
+                self._bloom = _BloomFilter(expected_items=count * 2, fp_rate=_BLOOM_FP_RATE)
+            # 增量匯入時，先暫時移除非必要索引以加速寫入 (小量增量除外)
+            db_bytes = os.path.getsize(self.db_path)
+            if incoming_bytes is None or \
+                    incoming_bytes * _PRESIZE_RATIO >= db_bytes * _DEFER_INDEX_MIN_RATIO:
+                self.drop_secondary_indexes()
+            else:
+                log_print(f'    📇 小量增量 ({incoming_bytes / 1024 / 1024:,.1f} MB 輸入)，'
+                          f'保留既有索引')
 
-        # 載入去重鍵值
-        if load_dedup:
+        # 載入去重鍵值 (新 DB 無既有鍵，不必掃描)
+        if load_dedup and not is_new:
             self._load_dedup_keys()
 
+        # 載入階段不做每批次 commit: 重建 = 整體單一交易；增量 = 每個來源檔一個交易
+        self._single_txn = True
+
+    def _tune_for_bulk(self, cursor):
+        """
+        批量匯入效能設定 (finalize 以 _tune_for_serving() 恢復)；可由 pragmas 覆寫 (見 __init__)。
+        預設: 重建時舊檔已刪除，載入/索引/FTS 期間完全不寫 journal 也不 fsync；
+        代價是此期間若程序中斷，資料庫檔可能損毀 → 重新執行重建即可。
+        增量匯入保留 WAL (既有資料需要可回復)，只關閉同步。
+        """
+        opts = self._pragmas
+        journal_mode = (opts.get('journal_mode') or ('OFF' if self._rebuild else 'WAL')).upper()
+        cursor.execute(f'PRAGMA journal_mode={journal_mode}')
+        self._journal_off = journal_mode != 'WAL'
+        synchronous = (opts.get('synchronous') or 'OFF').upper()
+        cursor.execute(f'PRAGMA synchronous={synchronous}')
+        cache_mb = opts.get('cache_size_mb') or 512
+        cursor.execute(f'PRAGMA cache_size=-{int(cache_mb * 1024)}')  # 預設 512MB cache
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        mmap_mb = opts.get('mmap_size_mb')
+        mmap_mb = 10240 if mmap_mb is None else mmap_mb
+        cursor.execute(f'PRAGMA mmap_size={int(mmap_mb) << 20}')  # 預設 10GB 上限 mmap: 讀頁免 read() 複製
+        cursor.execute('PRAGMA wal_autocheckpoint=10000')  # 增量 (WAL) 匯入時減少 checkpoint 停頓
+        # CREATE INDEX 的外部排序可由 SQLite 內建的多執行緒 sorter 分擔 (finalize 建索引時受益)
+        cursor.execute(f'PRAGMA threads={_SORTER_THREADS}')
+
+    def _tune_for_serving(self):
+        """恢復查詢服務用的安全設定: WAL + synchronous=NORMAL + 一般 mmap / checkpoint"""
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')    # 確保安全同步
+        self.conn.execute('PRAGMA mmap_size=268435456')   # 恢復一般查詢用 256MB mmap
+        self.conn.execute('PRAGMA wal_autocheckpoint=1000')
+        self.conn.commit()
+        self._journal_off = False
+
+    def _ensure_dedup_index(self, cursor):
+        """
+        建立 UNIQUE idx_dedup_key (dedup_key 為 NULL 的記錄可重複)。
+        舊版 DB 的非 UNIQUE 索引會就地升級；既有資料已含重複鍵時沿用 (或建立) 一般索引。
+        先以 GROUP BY 檢查重複鍵，不靠 CREATE UNIQUE INDEX 失敗再退回:
+        重建模式 journal_mode=OFF 無法撤回失敗的 CREATE，會留下損毀的 schema。
+        """
+        unique = {row[1]: row[2] for row in cursor.execute(
+            'PRAGMA index_list(land_transaction)')}.get('idx_dedup_key')
+        self._dedup_indexed = True
+        if unique:
+            return
+        dup = cursor.execute(
+            'SELECT 1 FROM land_transaction WHERE dedup_key IS NOT NULL '
+            'GROUP BY dedup_key HAVING COUNT(*) > 1 LIMIT 1').fetchone()
+        if dup:
+            log_print('  ⚠️  資料含重複 dedup_key，使用非 UNIQUE 索引')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_dedup_key ON land_transaction(dedup_key)')
+            return
+        if unique is not None:
+            cursor.execute('DROP INDEX idx_dedup_key')
+        cursor.execute('CREATE UNIQUE INDEX idx_dedup_key ON land_transaction(dedup_key)')
+
+    def _insert_rows(self, rows: list):
+        """
+        executemany INSERT OR IGNORE；被 UNIQUE 索引忽略的列自 inserted 改計為 duplicated。
+        (呼叫端已先把每列計入 inserted)
+        """
+        if not rows:
+            return
+        ignored = len(rows) - self.conn.executemany(INSERT_DEDUP_SQL, rows).rowcount
+        if ignored > 0:
+            self._stats['inserted'] -= ignored
+            self._stats['duplicated'] += ignored
+
+    def _presize(self, nbytes: int):
+        """
+        預先把檔案擴展到約 nbytes: 寫入暫存 zeroblob 表後 DROP，
+        空頁留在 freelist 供後續 INSERT 重用，避免匯入時檔案逐頁成長。
+        (預估過大時多餘的 freelist 頁會留在檔內，直到 VACUUM)
+        """
+        chunk = 64 << 20  # 每列 64 MiB
+        t0 = time.time()
+        self.conn.execute('CREATE TABLE _presize (b BLOB)')
+        remaining = nbytes
+        while remaining > 0:
+            n = min(chunk, remaining)
+            self.conn.execute('INSERT INTO _presize VALUES (zeroblob(?))', (n,))
+            remaining -= n
+        self.conn.execute('DROP TABLE _presize')
+        self.conn.commit()
+        log_print(f'    📐 預配置 {nbytes / 1024 / 1024:,.0f} MB ({time.time() - t0:.1f}s)')
+
     def _create_tables(self, cursor):
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS land_transaction (
@@ -516,12 +878,18 @@ class LandDataDB:
                 community_name  TEXT,
                 lat             REAL,
                 lng             REAL,
-                dedup_key       TEXT
+                dedup_key       TEXT,
+                addr_key        TEXT
             )
         ''')
+        # addr_key: 社區回填比對鍵 (見 community_addr_key)，由 backfill_community 補算；
+        # 舊版 DB 無此欄位時補上
+        cols = {row[1] for row in cursor.execute('PRAGMA table_info(land_transaction)')}
+        if 'addr_key' not in cols:
+            cursor.execute('ALTER TABLE land_transaction ADD COLUMN addr_key TEXT')
 
     def _load_dedup_keys(self):
-        """從既有資料載入 dedup_key 到 Bloom filter (~9 MB)"""
+        """從既有資料載入 dedup_key 到 Bloom filter (~16 MB)"""
         cur = self.conn.cursor()
         # 檢查是否有 dedup_key 欄位 (向後相容)
         cur.execute('PRAGMA table_info(land_transaction)')
@@ -530,34 +898,83 @@ class LandDataDB:
             log_print('    ⚠ 舊版 DB 無 dedup_key 欄位，跳過載入')
             return
 
+        # 走 idx_dedup_key 覆蓋索引循序掃描 (比掃整張表小得多)，以大批 fetchmany 取回
+        cur.arraysize = 65536
         cur.execute('SELECT dedup_key FROM land_transaction WHERE dedup_key IS NOT NULL')
+        add_many = self._bloom.add_many
         count = 0
-        for (key,) in cur:
-            self._bloom.add(key)
-            count += 1
+        while True:
+            rows = cur.fetchmany()
+            if not rows:
+                break
+            count += add_many([key for (key,) in rows])
         log_print(f'    Bloom filter: {count:,} 既有鍵值 (~{self._bloom.memory_mb():.1f} MB)')
 
-    def _drop_non_essential_indexes(self, cursor):
-        """暫時移除非去重索引，大幅加速批量寫入"""
-        # 保留 idx_dedup_key (去重必需)，其餘在 finalize() 重建
-        drop_indexes = [
-            'idx_county_city', 'idx_district', 'idx_street', 'idx_lane',
-            'idx_number', 'idx_floor', 'idx_date', 'idx_price', 'idx_serial',
-            'idx_community',
-            'idx_addr_combo', 'idx_community_address', 'idx_street_lane_district',
-            'idx_search_numbers', 'idx_district_street_number',
-            'idx_district_street_lane', 'idx_community_district',
-        ]
-        dropped = 0
-        for idx_name in drop_indexes:
-            try:
-                cursor.execute(f'DROP INDEX IF EXISTS {idx_name}')
-                dropped += 1
-            except Exception:
-                pass
-        if dropped:
-            self.conn.commit()
-            log_print(f'    🗑  暫移 {dropped} 個索引 (finalize 時重建)')
+    def drop_secondary_indexes(self):
+        """
+        暫時移除 idx_dedup_key 以外的所有 idx_* 索引，大幅加速批量寫入。
+        各索引的 CREATE 語句先存入 _deferred_index 表 (與 DROP 同一交易)，
+        finalize() 時原樣重建 — 含 db/optimize_indexes.sql 等外部加建的索引；
+        即使中途中斷或 skip_finalize，下次 finalize() 仍會補建。
+        """
+        cur = self.conn.cursor()
+        cur.execute('CREATE TABLE IF NOT EXISTS _deferred_index '
+                    '(name TEXT PRIMARY KEY, sql TEXT NOT NULL) WITHOUT ROWID')
+        rows = cur.execute(
+            "SELECT name, sql FROM sqlite_master "
+            "WHERE type = 'index' AND tbl_name = 'land_transaction' "
+            "AND name LIKE 'idx\\_%' ESCAPE '\\' AND name != 'idx_dedup_key' "
+            "AND sql IS NOT NULL"
+        ).fetchall()
+        cur.executemany('INSERT OR REPLACE INTO _deferred_index VALUES (?, ?)', rows)
+        for name, _ in rows:
+            cur.execute(f'DROP INDEX {name}')
+        self.conn.commit()
+        if rows:
+            log_print(f'    🗑  暫移 {len(rows)} 個索引 (finalize 時重建)')
+
+    def _create_secondary_indexes(self, cursor):
+        """
+        建立 SECONDARY_INDEXES，並重建 drop_secondary_indexes() 暫移的其他索引
+        (RETIRED_INDEXES 除外；僅能於所有匯入完成後呼叫)
+        """
+        for name, cols in SECONDARY_INDEXES:
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON land_transaction({cols})')
+        for name in RETIRED_INDEXES:  # 小量增量時未暫移的舊索引
+            cursor.execute(f'DROP INDEX IF EXISTS {name}')
+        has_deferred = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='_deferred_index'"
+        ).fetchone()
+        if has_deferred:
+            existing = {row[0] for row in cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type='index'")}
+            for name, sql in cursor.execute('SELECT name, sql FROM _deferred_index').fetchall():
+                if name not in existing and name not in RETIRED_INDEXES:
+                    cursor.execute(sql)
+            cursor.execute('DROP TABLE _deferred_index')
+        self.conn.commit()
+
+    def _indexes_missing_stats(self) -> bool:
+        """land_transaction 是否有索引尚無 sqlite_stat1 統計"""
+        has_stat1 = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='sqlite_stat1'"
+        ).fetchone()
+        if not has_stat1:
+            return True
+        return self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='index' "
+            "AND tbl_name='land_transaction' "
+            "AND name NOT IN (SELECT idx FROM sqlite_stat1 WHERE idx IS NOT NULL) "
+            "LIMIT 1"
+        ).fetchone() is not None
+
+    def _check_load_phase(self):
+        """順序防護: finalize() 建好索引/FTS 後不可再寫入資料"""
+        if self._finalized:
+            raise RuntimeError(
+                'LandDataDB 已 finalize (索引/FTS 已建立)，不可再匯入資料；'
+                '請在所有 import 完成後才呼叫 finalize()'
+            )
 
     def upsert_record(self, rec: dict):
         """
@@ -566,10 +983,11 @@ class LandDataDB:
         邏輯:
           1. 檢驗資料品質 → 不合格 → discard
           2. 計算 dedup_key = "date7|addr_norm|price"
-          3. 檢查 batch_keys → bloom filter → DB
+          3. 檢查 bloom filter → DB (bloom hit 暫存，flush 時批次確認)
           4. 已存在 → enrich (補充空欄位) 或 duplicate
           5. 不存在 → insert
         """
+        self._check_load_phase()
         self._stats['total_scanned'] += 1
 
         # —— 資料品質驗證 ——
@@ -578,7 +996,7 @@ class LandDataDB:
             self._stats['discarded'] += 1
             self._stats['discard_no_addr'] += 1
             return
-        if not re.search(r'號|地號', addr):
+        if '號' not in addr:  # 「地號」亦含「號」
             self._stats['discarded'] += 1
             self._stats['discard_no_number'] += 1
             if _VERBOSE and self._verbose_count['discarded'] < _VERBOSE_MAX:
@@ -588,88 +1006,57 @@ class LandDataDB:
 
         # —— 計算 dedup key (三鍵: 日期 + 地址 + 總價) ——
         date_str = rec.get('transaction_date', '') or ''
-        d = date_str.replace('/', '')[:7]
-        addr_norm = strip_city(norm_addr_simple(addr))
         price = rec.get('total_price') or 0
         try:
             price = int(price)
         except (ValueError, TypeError):
             price = 0
+        dedup_key = make_dedup_key(dedup_date_part(date_str), addr, price)
 
-        if not addr_norm:
+        if dedup_key is None:
             # 無法正規化地址 → 直接插入 (不做去重)
-            values = tuple(rec.get(col) for col in LAND_COLUMNS)
+            values = _record_values(rec)
             self._insert_batch.append((*values, None))
             self._stats['inserted'] += 1
             if len(self._insert_batch) >= self.BATCH_SIZE:
                 self._flush_inserts()
             return
 
-        dedup_key = f"{d}|{addr_norm}|{price}"
-
-        # —— Level 1: 檢查當前批次 (O(1), set 最多 BATCH_SIZE 個) ——
-        if dedup_key in self._batch_keys:
-            self._stats['duplicated'] += 1
-            if _VERBOSE and self._verbose_count['duplicated'] < _VERBOSE_MAX:
-                log_print(f'    [重複-batch] serial={rec.get("serial_no","?")} key={dedup_key}: {addr}')
-                self._verbose_count['duplicated'] += 1
+        # —— 檢查 Bloom filter (~16 MB, O(k))；插入時即加入，同批次內的重複也會命中 ——
+        if self._bloom.check_and_add(dedup_key):
+            # Bloom filter hit → 可能是重複，暫存待批次查 DB 確認 (0.1% 偽陽性)
+            self._pending_lookups.append((dedup_key, rec))
+            if len(self._pending_lookups) >= _LOOKUP_CHUNK:
+                self._flush_inserts()
             return
 
-        # —— Level 2: 檢查 Bloom filter (~9 MB, O(k)) ——
-        if dedup_key in self._bloom:
-            # Bloom filter hit → 可能是重複，查 DB 確認 (0.1% 偽陽性)
-            row = self.conn.execute(
-                'SELECT id FROM land_transaction WHERE dedup_key = ?',
-                (dedup_key,)
-            ).fetchone()
-            if row:
-                existing_id = row[0]
-                enriched = self._try_enrich(existing_id, rec)
-                if enriched:
-                    self._stats['enriched'] += 1
-                    if _VERBOSE and self._verbose_count['enriched'] < _VERBOSE_MAX:
-                        detail = ', '.join(f'{k}={v}' for k, v in enriched.items())
-                        log_print(f'    [補充] exist_id={existing_id} serial={rec.get("serial_no","?")} {detail}: {addr}')
-                        self._verbose_count['enriched'] += 1
-                else:
-                    self._stats['duplicated'] += 1
-                    if _VERBOSE and self._verbose_count['duplicated'] < _VERBOSE_MAX:
-                        log_print(f'    [重複] exist_id={existing_id} serial={rec.get("serial_no","?")} key={dedup_key}: {addr}')
-                        self._verbose_count['duplicated'] += 1
-                return
-            # Bloom false positive → fall through to insert
-
         # —— 新記錄 → 插入 ——
-        values = tuple(rec.get(col) for col in LAND_COLUMNS)
+        values = _record_values(rec)
         self._insert_batch.append((*values, dedup_key))
-        self._batch_keys.add(dedup_key)
-        self._bloom.add(dedup_key)
         self._stats['inserted'] += 1
 
         if len(self._insert_batch) >= self.BATCH_SIZE:
             self._flush_inserts()
 
-    def _try_enrich(self, row_id: int, new_rec: dict) -> dict:
+    def _try_enrich(self, row_id: int, new_rec, row=None) -> dict:
         """
         嘗試用新資料補充既有記錄的空欄位。
+        new_rec: record dict，或依 LAND_COLUMNS 順序的 tuple (以位置取值)。
+        row: 已預先取得的既有 enrich 欄位 (見 _lookup_existing)；None 時查 DB。
         回傳 {欄位: 新值} dict (空 dict = 沒更新)。
         """
         # 讀取既有欄位
-        cols_to_check = [col for col, _ in ENRICH_FIELDS]
-        col_sql = ', '.join(cols_to_check)
-        cur = self.conn.cursor()
-        row = cur.execute(
-            f'SELECT {col_sql} FROM land_transaction WHERE id = ?',
-            (row_id,)
-        ).fetchone()
-        if not row:
-            return {}
+        if row is None:
+            row = self.conn.execute(ENRICH_SELECT_SQL, (row_id,)).fetchone()
+            if not row:
+                return {}
 
+        get = new_rec.get if isinstance(new_rec, dict) else None
         updates = {}
-        for i, (col_name, is_empty) in enumerate(ENRICH_FIELDS):
-            current_val = row[i]
+        for (col_name, is_empty), current_val, pos in zip(
+                ENRICH_FIELDS, row, _ENRICH_TUPLE_IDX):
             if is_empty(current_val):
-                new_val = new_rec.get(col_name)
+                new_val = get(col_name) if get else new_rec[pos]
                 if new_val is not None and new_val != '':
                     updates[col_name] = new_val
 
@@ -681,27 +1068,88 @@ class LandDataDB:
             self._flush_enriches()
         return updates
 
+    def _lookup_existing(self, keys) -> dict:
+        """
+        批次查詢既有記錄: 每 _LOOKUP_CHUNK 個鍵一次 IN (...) 查詢，
+        取代逐筆 SELECT id + SELECT 欄位 的兩次往返。
+        回傳 {dedup_key: (id, enrich 欄位...)}；同鍵多筆時取第一筆 (索引順序 = 最小 id)。
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        if not keys:
+            return found
+        if not self._dedup_indexed:
+            # 重建模式首次查 DB → 此時才建 idx_dedup_key (之後隨寫入維護)
+            self._ensure_dedup_index(self.conn.cursor())
+        execute = self.conn.execute
+        for i in range(0, len(keys), _LOOKUP_CHUNK):
+            chunk = keys[i:i + _LOOKUP_CHUNK]
+            sql = ENRICH_LOOKUP_SQL.format(','.join('?' * len(chunk)))
+            for row in execute(sql, chunk):
+                if row[0] not in found:
+                    found[row[0]] = row[1:]
+        return found
+
     def _flush_inserts(self):
-        if not self._insert_batch:
-            return
-        self.conn.executemany(INSERT_DEDUP_SQL, self._insert_batch)
-        self.conn.commit()
-        self._insert_batch = []
-        self._batch_keys.clear()
+        """
+        寫入待插入批次，再批次確認 upsert_record 暫存的 bloom hit 候選。
+        須先插入: 候選可能是同批次記錄的重複，插入後查 DB 才能命中。
+        """
+        if self._insert_batch:
+            self._insert_rows(self._insert_batch)
+            self._insert_batch = []
+        if self._pending_lookups:
+            pending, self._pending_lookups = self._pending_lookups, []
+            self._process_enrich_records(pending)
+        self.commit()
 
     def _flush_enriches(self):
         if not self._enrich_batch:
             return
+        # 同一 id 的多次補充依序合併 (後者覆寫前者，與逐筆 UPDATE 結果相同)
+        staged: dict = {}
+        width = len(_ENRICH_COLS)
         for updates, row_id in self._enrich_batch:
-            set_clauses = ', '.join(f'{col} = ?' for col in updates)
-            values = list(updates.values()) + [row_id]
-            self.conn.execute(
-                f'UPDATE land_transaction SET {set_clauses} WHERE id = ?',
-                values
-            )
-        self.conn.commit()
+            vals = staged.get(row_id)
+            if vals is None:
+                vals = staged[row_id] = [None] * width
+            for col, val in updates.items():
+                vals[_ENRICH_COL_POS[col]] = val
+        payload = json.dumps([[row_id, *vals] for row_id, vals in staged.items()],
+                             ensure_ascii=False)
+        self.conn.execute(ENRICH_APPLY_SQL, (payload,))
+        self.commit()
         self._enrich_batch = []
 
+    def commit(self):
+        """
+        匯入階段的批次提交點。
+        載入階段不在每批次提交 (省去每批次的 commit/WAL 同步開銷)：
+        重建模式整個載入階段為單一交易，由 finalize()/close() 一次 commit
+        (中途失敗時重新執行重建即可)；增量模式於 bulk_load_mode() 結束時每檔提交一次。
+        """
+        if not self._single_txn:
+            self.conn.commit()
+
+    @contextmanager
+    def bulk_load_mode(self):
+        """
+        單一來源檔的批量載入區段:
+            with db.bulk_load_mode():
+                import_file(db, path)
+
+        區段內各批次不提交 (見 commit())；正常離開時寫入剩餘批次並提交 —
+        增量模式每個來源檔為一個交易，重建模式維持整個載入階段單一交易。
+        發生例外時不提交，連線關閉即回滾該檔 (增量模式)。
+        PRAGMA 沿用 open() 的匯入設定 (synchronous/cache/mmap，IMMEDIATE 交易)，
+        不切換 locking_mode=EXCLUSIVE，以免擋住 WAL 讀者與 checkpoint。
+        """
+        self._check_load_phase()
+        yield self
+        self.flush_all()
+        if not self._rebuild:
+            self.conn.commit()
+
     def flush_all(self):
         """強制寫入所有待處理批次"""
         self._flush_inserts()
@@ -713,19 +1161,17 @@ class LandDataDB:
 
         邏輯:
           1. 使用預計算的 _dedup_key (若有)
-          2. 批次 bloom filter 檢查 (Python set 去重同批重複)
+          2. bloom filter 檢查 (插入即加入，同批重複亦命中)
           3. bloom hit → 查 DB → enrich 或 duplicate
           4. 新記錄 → sub-batch executemany 插入
 
-        內部以 _SUB_BATCH 為單位 flush + 清 batch_keys，
-        確保跨 sub-batch 的重複走 bloom → DB → enrich。
+        內部以 _SUB_BATCH 為單位 flush: 先寫入該批，再處理 bloom hit 候選，
+        同批次與跨批次的重複一律走 bloom → DB → enrich。
         """
+        self._check_load_phase()
         batch_insert = []
         enrich_candidates = []  # bloom hit → 需檢查 DB
-        _norm = norm_addr_simple
-        _strip = strip_city
         _bloom = self._bloom
-        _batch_keys = self._batch_keys
         stats = self._stats
         _SUB_BATCH = 10000
 
@@ -737,7 +1183,7 @@ class LandDataDB:
                 stats['discarded'] += 1
                 stats['discard_no_addr'] += 1
                 continue
-            if '號' not in addr and '地號' not in addr:
+            if '號' not in addr:
                 stats['discarded'] += 1
                 stats['discard_no_number'] += 1
                 if _VERBOSE and self._verbose_count['discarded'] < _VERBOSE_MAX:
@@ -750,50 +1196,35 @@ class LandDataDB:
             if dedup_key is None:
                 # fallback: 動態計算
                 date_str = rec.get('transaction_date', '') or ''
-                d = date_str.replace('/', '')[:7]
-                addr_norm = _strip(_norm(addr))
                 price = rec.get('total_price') or 0
                 try:
                     price = int(price)
                 except (ValueError, TypeError):
                     price = 0
-                dedup_key = f"{d}|{addr_norm}|{price}" if addr_norm else None
+                dedup_key = make_dedup_key(dedup_date_part(date_str), addr, price)
 
-            if dedup_key:
-                if dedup_key in _batch_keys:
-                    stats['duplicated'] += 1
-                    if _VERBOSE and self._verbose_count['duplicated'] < _VERBOSE_MAX:
-                        log_print(f'    [重複-batch] {dedup_key}: {addr}')
-                        self._verbose_count['duplicated'] += 1
-                    continue
-
-                if dedup_key in _bloom:
-                    # bloom hit → 收集待查 DB 確認
-                    enrich_candidates.append((dedup_key, rec))
-                    continue
-
-                _batch_keys.add(dedup_key)
-                _bloom.add(dedup_key)
+            if dedup_key and _bloom.check_and_add(dedup_key):
+                # bloom hit → 收集待查 DB 確認
+                enrich_candidates.append((dedup_key, rec))
+                continue
 
-            values = tuple(rec.get(col) for col in LAND_COLUMNS)
+            values = _record_values(rec)
             batch_insert.append((*values, dedup_key))
             stats['inserted'] += 1
 
-            # sub-batch flush: 寫入 DB + 處理 enrich + 清 batch_keys
+            # sub-batch flush: 寫入 DB → 處理 enrich (候選可能命中剛寫入的列)
             if len(batch_insert) >= _SUB_BATCH:
-                self.conn.executemany(INSERT_DEDUP_SQL, batch_insert)
+                self._insert_rows(batch_insert)
                 batch_insert = []
                 if enrich_candidates:
                     self._process_enrich_records(enrich_candidates)
                     enrich_candidates = []
-                _batch_keys.clear()
 
         # 剩餘的 tail batch
         if batch_insert:
-            self.conn.executemany(INSERT_DEDUP_SQL, batch_insert)
+            self._insert_rows(batch_insert)
         if enrich_candidates:
             self._process_enrich_records(enrich_candidates)
-        _batch_keys.clear()
 
     def fast_insert_tuples(self, tuples_list):
         """
@@ -802,25 +1233,27 @@ class LandDataDB:
         每個 tuple 格式: (*LAND_COLUMNS_values, dedup_key)
         address 欄位在 tuple[2]，dedup_key 在 tuple[-1]。
 
-        內部以 _SUB_BATCH 為單位 flush + 清 batch_keys，
-        確保跨 sub-batch 的重複走 bloom → DB → enrich。
+        內部以 _SUB_BATCH 為單位 flush: 先寫入該批，再處理 bloom hit 候選，
+        同批次與跨批次的重複一律走 bloom → DB → enrich。
+        tuple 正是 sqlite3 executemany 直接綁定的列格式，批次內不轉存；
+        total_scanned / inserted 於批次層級累加，迴圈內不逐列更新計數 dict。
         """
+        self._check_load_phase()
         batch_insert = []
         enrich_candidates = []  # bloom hit → 需檢查 DB
         _bloom = self._bloom
-        _batch_keys = self._batch_keys
         stats = self._stats
         _SUB_BATCH = 10000  # 與舊版 BATCH_SIZE 一致
+        stats['total_scanned'] += len(tuples_list)
 
         for tup in tuples_list:
-            stats['total_scanned'] += 1
             addr = tup[2]  # address 是第 3 個欄位
 
             if not addr:
                 stats['discarded'] += 1
                 stats['discard_no_addr'] += 1
                 continue
-            if '號' not in addr and '地號' not in addr:
+            if '號' not in addr:
                 stats['discarded'] += 1
                 stats['discard_no_number'] += 1
                 if _VERBOSE and self._verbose_count['discarded'] < _VERBOSE_MAX:
@@ -830,38 +1263,28 @@ class LandDataDB:
 
             dedup_key = tup[-1]  # 最後一個欄位
 
-            if dedup_key:
-                if dedup_key in _batch_keys:
-                    stats['duplicated'] += 1
-                    if _VERBOSE and self._verbose_count['duplicated'] < _VERBOSE_MAX:
-                        log_print(f'    [重複-batch] {dedup_key}: {addr}')
-                        self._verbose_count['duplicated'] += 1
-                    continue
-                if dedup_key in _bloom:
-                    # bloom hit → 收集待查 DB 確認
-                    enrich_candidates.append((dedup_key, tup))
-                    continue
-                _batch_keys.add(dedup_key)
-                _bloom.add(dedup_key)
+            if dedup_key and _bloom.check_and_add(dedup_key):
+                # bloom hit → 收集待查 DB 確認
+                enrich_candidates.append((dedup_key, tup))
+                continue
 
             batch_insert.append(tup)
-            stats['inserted'] += 1
 
-            # sub-batch flush: 寫入 DB + 處理 enrich + 清 batch_keys
+            # sub-batch flush: 寫入 DB → 處理 enrich (候選可能命中剛寫入的列)
             if len(batch_insert) >= _SUB_BATCH:
-                self.conn.executemany(INSERT_DEDUP_SQL, batch_insert)
+                stats['inserted'] += len(batch_insert)
+                self._insert_rows(batch_insert)
                 batch_insert = []
                 if enrich_candidates:
                     self._process_enrich_tuples(enrich_candidates)
                     enrich_candidates = []
-                _batch_keys.clear()
 
         # 剩餘的 tail batch
         if batch_insert:
-            self.conn.executemany(INSERT_DEDUP_SQL, batch_insert)
+            stats['inserted'] += len(batch_insert)
+            self._insert_rows(batch_insert)
         if enrich_candidates:
             self._process_enrich_tuples(enrich_candidates)
-        _batch_keys.clear()
 
     # ------------------------------------------------------------------
     # enrich 處理 (bloom hit 後查 DB 確認)
@@ -870,10 +1293,11 @@ class LandDataDB:
     def _process_enrich_records(self, candidates):
         """處理 fast_insert_records 的 bloom hit 候選: 查 DB → enrich 或 duplicate。"""
         stats = self._stats
-        cur = self.conn.cursor()
         false_positive_inserts = []
         seen_fp_keys = set()  # 同批次內已處理的 FP key，防止多筆相同 FP key 重複插入
 
+        existing = self._lookup_existing(k for k, _ in candidates)
+
         for dedup_key, rec in candidates:
             # ── 同批次內已是 FP → 直接算 duplicate，不再查 DB ──
             if dedup_key in seen_fp_keys:
@@ -883,13 +1307,10 @@ class LandDataDB:
                     self._verbose_count['duplicated'] += 1
                 continue
 
-            row = cur.execute(
-                'SELECT id FROM land_transaction WHERE dedup_key = ?',
-                (dedup_key,)
-            ).fetchone()
+            row = existing.get(dedup_key)
             if row:
                 existing_id = row[0]
-                enriched = self._try_enrich(existing_id, rec)
+                enriched = self._try_enrich(existing_id, rec, row[1:])
                 if enriched:
                     stats['enriched'] += 1
                     if _VERBOSE and self._verbose_count['enriched'] < _VERBOSE_MAX:
@@ -903,24 +1324,22 @@ class LandDataDB:
                         self._verbose_count['duplicated'] += 1
             else:
                 # Bloom false positive → 插入，同時記錄防止同批次重複
-                values = tuple(rec.get(col) for col in LAND_COLUMNS)
+                values = _record_values(rec)
                 false_positive_inserts.append((*values, dedup_key))
                 seen_fp_keys.add(dedup_key)
-                self._batch_keys.add(dedup_key)
                 self._bloom.add(dedup_key)  # 補齊：FP 插入後必須加入 bloom
                 stats['inserted'] += 1
 
-        if false_positive_inserts:
-            self.conn.executemany(INSERT_DEDUP_SQL, false_positive_inserts)
+        self._insert_rows(false_positive_inserts)
         self._flush_enriches()
 
     def _process_enrich_tuples(self, candidates):
         """處理 fast_insert_tuples 的 bloom hit 候選: 查 DB → enrich 或 duplicate。"""
         stats = self._stats
-        cur = self.conn.cursor()
         false_positive_inserts = []
         seen_fp_keys = set()  # 同批次內已處理的 FP key，防止多筆相同 FP key 重複插入
-        _n_cols = len(LAND_COLUMNS)
+
+        existing = self._lookup_existing(k for k, _ in candidates)
 
         for dedup_key, tup in candidates:
             # ── 同批次內已是 FP → 直接算 duplicate，不再查 DB ──
@@ -931,15 +1350,10 @@ class LandDataDB:
                     self._verbose_count['duplicated'] += 1
                 continue
 
-            row = cur.execute(
-                'SELECT id FROM land_transaction WHERE dedup_key = ?',
-                (dedup_key,)
-            ).fetchone()
+            row = existing.get(dedup_key)
             if row:
                 existing_id = row[0]
-                # tuple → dict 以便 _try_enrich 使用
-                rec = dict(zip(LAND_COLUMNS, tup[:_n_cols]))
-                enriched = self._try_enrich(existing_id, rec)
+                enriched = self._try_enrich(existing_id, tup, row[1:])
                 if enriched:
                     stats['enriched'] += 1
                     if _VERBOSE and self._verbose_count['enriched'] < _VERBOSE_MAX:
@@ -955,12 +1369,10 @@ class LandDataDB:
                 # Bloom false positive → 插入，同時記錄防止同批次重複
                 false_positive_inserts.append(tup)
                 seen_fp_keys.add(dedup_key)
-                self._batch_keys.add(dedup_key)
                 self._bloom.add(dedup_key)  # 補齊：FP 插入後必須加入 bloom
                 stats['inserted'] += 1
 
-        if false_positive_inserts:
-            self.conn.executemany(INSERT_DEDUP_SQL, false_positive_inserts)
+        self._insert_rows(false_positive_inserts)
         self._flush_enriches()
 
     def backfill_community(self, api_db_path: str):
@@ -969,170 +1381,307 @@ class LandDataDB:
 
         演算法（O(N) 單次掃描，不用 LIKE）:
           Phase 1: 從 API DB 建立 地址鍵值(去縣市+去樓層+半形) → community 映射
-          Phase 2: 掃描 land_transaction，對無社區記錄做 Python dict 比對
-                   → batch UPDATE
+          Phase 2: 無社區記錄補算 addr_key 欄位 (已有者沿用)，
+                   映射表載入 temp 表後以單一 UPDATE ... FROM 在 SQLite 內比對
           ※ 全形/半形地址統一在 Python 正規化後比對，不再依賴 SQL LIKE
         """
         if not os.path.exists(api_db_path):
             return 0
 
-        print('  回填社區名...', flush=True)
+        log_print('  回填社區名...', flush=True)
         conn_t = sqlite3.connect(api_db_path)
         conn_t.text_factory = lambda b: b.decode('utf-8', errors='replace')
+        # 同一原始地址+社區先在 SQLite 內聚合計數 (C 層 hash aggregate)，
+        # Python 端只需處理相異 (address, community) 組合。
+        # 「有門牌號」條件以 instr() 在 SQLite 端先行過濾 — 須對原始地址判斷，
+        # strip_floor 會把結尾的「號」一併去除，去樓層後再檢查會誤刪幾乎所有鍵值
         rows = conn_t.execute(
-            "SELECT city, address, community FROM transactions "
-            "WHERE community != '' AND community IS NOT NULL AND address != ''"
-        ).fetchall()
-        conn_t.close()
+            "SELECT address, community, COUNT(*) FROM transactions "
+            "WHERE community != '' AND community IS NOT NULL "
+            "AND instr(address, '號') > 0 "
+            "GROUP BY address, community"
+        )
 
-        # Phase 1: addr_key → {community: vote_count}
+        # Phase 1: addr_key → Counter{community: vote_count} (逐列串流，不 fetchall)
         # addr_key = 去縣市 + 去樓層 + 半形正規化
-        votes: dict = {}
-        for _city_code, addr_raw, community in rows:
-            addr = strip_floor(strip_city(norm_addr_simple(clean_trans_addr(addr_raw))))
-            if not addr or '號' not in addr:
-                continue
-            bucket = votes.setdefault(addr, {})
-            bucket[community] = bucket.get(community, 0) + 1
-
-        comm_map = {addr: max(v, key=v.get) for addr, v in votes.items()}
-        print(f'    社區映射: {len(comm_map):,} 個地址鍵值', flush=True)
+        votes = defaultdict(Counter)
+        for addr_raw, community, n in rows:
+            addr = community_addr_key(clean_trans_addr(addr_raw))
+            if addr:
+                votes[addr][community] += n
+        conn_t.close()
 
-        # Phase 2: 單次掃描，比對無社區的記錄
-        cur = self.conn.cursor()
-        updates: list = []
-        updated = 0
+        comm_map = {addr: c.most_common(1)[0][0] for addr, c in votes.items()}
+        del votes
+        log_print(f'    社區映射: {len(comm_map):,} 個地址鍵值', flush=True)
 
-        for row_id, addr in cur.execute(
+        # Phase 2a: 補齊無社區記錄的 addr_key 欄位 (每列只算一次，之後的回填直接沿用)
+        # 地址正規化為純 CPU 運算 → 每 _BACKFILL_CHUNK 筆分片交給 worker 行程計算鍵值，
+        # 主行程只做 UPDATE (資料量不足一個分片時不啟動 Pool)。
+        # 以 keyset 分頁整頁讀完再 UPDATE: 不在同一連線未讀完的掃描中途寫入被掃描的表
+        pages = _iter_keyset_pages(
+            self.conn.cursor(),
             "SELECT id, address FROM land_transaction "
-            "WHERE community_name IS NULL OR community_name = ''"
-        ):
-            # 全形→半形正規化後比對，解決 CSV 全形與 API 半形不一致的問題
-            norm = strip_floor(strip_city(norm_addr_simple(addr or '')))
-            community = comm_map.get(norm)
-            if community:
-                updates.append((community, row_id))
-                if len(updates) >= 5000:
-                    self.conn.executemany(
-                        "UPDATE land_transaction SET community_name = ? WHERE id = ?",
-                        updates
-                    )
-                    self.conn.commit()
-                    updated += len(updates)
-                    updates = []
-
-        if updates:
-            self.conn.executemany(
-                "UPDATE land_transaction SET community_name = ? WHERE id = ?",
-                updates
-            )
-            self.conn.commit()
-            updated += len(updates)
+            "WHERE (community_name IS NULL OR community_name = '') AND addr_key IS NULL "
+            "AND id > ? ORDER BY id LIMIT ?",
+            self._BACKFILL_CHUNK,
+        )
+        keyed = 0
+        pool = None
+
+        try:
+            for chunk in pages:
+                addrs = [addr for _, addr in chunk]
+                if (pool is None and len(chunk) == self._BACKFILL_CHUNK
+                        and _worker_count() > 1):
+                    import multiprocessing  # 延後載入: 僅大量回填時才需要
+                    pool = multiprocessing.Pool(_worker_count())
+                if pool is not None:
+                    keys = pool.map(community_addr_key, addrs, chunksize=2000)
+                else:
+                    keys = map(community_addr_key, addrs)
+
+                # 全形→半形正規化後比對，解決 CSV 全形與 API 半形不一致的問題
+                self.conn.executemany(
+                    "UPDATE land_transaction SET addr_key = ? WHERE id = ?",
+                    zip(keys, (row_id for row_id, _ in chunk))
+                )
+                keyed += len(chunk)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        if keyed:
+            log_print(f'    地址鍵值: 新計算 {keyed:,} 筆', flush=True)
+
+        # Phase 2b: 映射表載入 temp 表，單一 UPDATE ... FROM 在 SQLite 內完成比對。
+        # WITHOUT ROWID: 以 addr_key 為叢集鍵，查詢一次 B-tree 即取得 community
+        # (不另建 autoindex 再回表)；依鍵排序寫入 → 只在 B-tree 尾端追加
+        self.conn.execute(
+            'CREATE TEMP TABLE IF NOT EXISTS _comm_map '
+            '(addr_key TEXT PRIMARY KEY, community TEXT) WITHOUT ROWID'
+        )
+        self.conn.execute('DELETE FROM _comm_map')
+        self.conn.executemany('INSERT INTO _comm_map VALUES (?, ?)', sorted(comm_map.items()))
+        updated = self.conn.execute(
+            "UPDATE land_transaction SET community_name = m.community "
+            "FROM _comm_map AS m "
+            "WHERE land_transaction.addr_key = m.addr_key "
+            "AND (land_transaction.community_name IS NULL "
+            "OR land_transaction.community_name = '')"
+        ).rowcount
+        self.conn.execute('DROP TABLE _comm_map')
+        self.commit()
 
         return updated
 
-    def finalize(self):
-        """建索引 + FTS5 + ANALYZE + VACUUM，並恢復安全的 PRAGMA 設定"""
+    def finalize(self, vacuum: Optional[bool] = None):
+        """
+        建索引 + FTS5 + VACUUM + ANALYZE，並恢復安全的 PRAGMA 設定。
+        vacuum: True/False 強制執行/略過 VACUUM；None = 依空頁比例自動決定 (見 _VACUUM_FREE_RATIO)。
+
+        階段順序固定: 匯入 (無次要索引) → 次要索引 → FTS5 → VACUUM → ANALYZE。
+        呼叫後即進入唯讀階段，之後的匯入呼叫會拋出 RuntimeError。
+        """
         self.flush_all()
+        self._finalized = True
+        self._single_txn = False
+        self.conn.commit()  # 結束載入階段交易
         cur = self.conn.cursor()
 
         # 恢復安全的同步設定
         cur.execute('PRAGMA synchronous=NORMAL')
         self.conn.commit()
 
-        # 單欄索引
+        # 次要索引 (匯入期間不存在，此時一次建立)；重建時 idx_dedup_key 也可能尚未建立
         log_print('  📇 建立索引...')
-        indexes = [
-            ('idx_county_city', 'county_city'),
-            ('idx_district', 'district'),
-            ('idx_street', 'street'),
-            ('idx_lane', 'lane'),
-            ('idx_number', 'number'),
-            ('idx_floor', 'floor'),
-            ('idx_date', 'transaction_date'),
-            ('idx_price', 'total_price'),
-            ('idx_serial', 'serial_no'),
-            ('idx_dedup_key', 'dedup_key'),
-            ('idx_community', 'community_name'),
-        ]
-        for name, col in indexes:
-            cur.execute(f'CREATE INDEX IF NOT EXISTS {name} ON land_transaction({col})')
-
-        # 複合索引（加速查詢服務）
-        composite_indexes = [
-            ('idx_addr_combo', 'county_city, district, street, lane, number'),
-            ('idx_community_address', 'community_name, address'),
-            ('idx_street_lane_district', 'street, lane, district'),
-            ('idx_search_numbers', 'street, lane, district, total_floors, build_date'),
-            ('idx_district_street_number', 'district, street, number'),
-            ('idx_district_street_lane', 'district, street, lane'),
-            ('idx_community_district', 'community_name, district'),
-        ]
-        for name, cols in composite_indexes:
-            cur.execute(f'CREATE INDEX IF NOT EXISTS {name} ON land_transaction({cols})')
+        if not self._dedup_indexed:
+            self._ensure_dedup_index(cur)
+        self._create_secondary_indexes(cur)
+
+        # FTS 與 address_counts 以同一個已索引水位增量更新，並於同一交易提交
+        upto = self._fts_indexed_upto(cur)
+        self._build_fts(cur, upto)
+        self._build_address_counts(cur, upto)
         self.conn.commit()
 
-        # FTS5
+        # 先壓縮再 ANALYZE: 統計取樣自壓縮後的檔案 (VACUUM INTO 會換成新連線)
+        try:
+            self._compact(vacuum)
+            self._update_stats()
+        finally:
+            self._tune_for_serving()
+
+    def _fts_indexed_upto(self, cursor) -> Optional[int]:
+        """
+        既有 address_fts 可增量追加時，回傳其已索引的最大 rowid；否則 None (需全量重建)。
+        land_transaction 為 AUTOINCREMENT 且匯入只新增列、enrich 不改 address，
+        故 id ≤ 此值的列皆已索引。已索引 rowid 取自 FTS5 自身的 docsize 影子表，
+        不另存狀態 — 中斷未 finalize 的匯入列 id 必大於此值，下次仍會補上。
+        """
+        if self._rebuild:
+            return None
+        row = cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type='table' AND name='address_fts'"
+        ).fetchone()
+        if not row or f"tokenize='{FTS_TOKENIZER}'" not in row[0]:
+            return None  # 不存在或斷詞器不同 (如舊版 unicode61)
+        try:
+            return cursor.execute('SELECT max(id) FROM address_fts_docsize').fetchone()[0]
+        except sqlite3.OperationalError:
+            return None
+
+    def _build_fts(self, cursor, upto: Optional[int]):
+        """
+        address_fts (external-content → land_transaction)。
+        增量匯入只追加 id > upto 的新列 (見 _fts_indexed_upto)，避免每次 finalize 都重新斷詞整張表；
+        upto 為 None (重建模式、斷詞器變更或無既有索引) 時全量 'rebuild'。
+        """
+        if upto is not None:
+            log_print('  🔍 更新 FTS5 全文檢索 (追加新列)...')
+            cursor.execute(
+                'INSERT INTO address_fts(rowid, address) '
+                'SELECT id, address FROM land_transaction WHERE id > ?', (upto,))
+            # 新 segment 交由 FTS5 automerge 逐步合併，不做整體 'optimize' 重寫
+            return
+
         log_print('  🔍 建立 FTS5 全文檢索...')
-        cur.execute('DROP TABLE IF EXISTS address_fts')
-        cur.execute('''
+        cursor.execute('DROP TABLE IF EXISTS address_fts')
+        cursor.execute(f'''
             CREATE VIRTUAL TABLE address_fts USING fts5(
                 address,
                 content='land_transaction',
                 content_rowid='id',
-                tokenize='unicode61'
+                tokenize='{FTS_TOKENIZER}'
             )
         ''')
-        cur.execute('''
-            INSERT INTO address_fts(rowid, address)
-            SELECT id, address FROM land_transaction WHERE address != ''
-        ''')
-        self.conn.commit()
+        # external-content 表以 'rebuild' 一次由 land_transaction 建索引
+        # (空地址不產生 token，與逐列 INSERT 結果相同，且 FTS 與內容表保持一致)
+        cursor.execute("INSERT INTO address_fts(address_fts) VALUES('rebuild')")
+        # 合併 rebuild 產生的多個 segment 為單一 b-tree，查詢時只需掃一個 segment
+        cursor.execute("INSERT INTO address_fts(address_fts) VALUES('optimize')")
 
-        # ANALYZE
-        log_print('  📊 更新統計資訊...')
-        self.conn.execute('ANALYZE')
-        self.conn.commit()
+    def _build_address_counts(self, cursor, upto: Optional[int]):
+        """
+        address_counts: 每個 (地址, 行政區) 的交易筆數 (address_match 的 addr_count)，
+        查詢時以主鍵查表取代每次 COUNT(*) OVER (PARTITION BY address) 的排序。
+        district 可能取自地址以外的欄位 (parse_address 的行政區提示)，同一地址字串可分屬不同區，
+        故依 (address, district) 分組: 以 district 篩選的查詢層級才能取得候選集內的筆數。
+        與 address_fts 同步: upto 非 None 且表已為此結構時只累加 id > upto 的新列，否則全量重算。
+        """
+        cols = {row[1] for row in cursor.execute('PRAGMA table_info(address_counts)')}
+        if upto is not None and 'district' in cols:
+            cursor.execute(
+                "INSERT INTO address_counts (address, district, cnt) "
+                "SELECT address, COALESCE(district, ''), COUNT(*) FROM land_transaction "
+                "WHERE id > ? AND address != '' GROUP BY 1, 2 "
+                "ON CONFLICT(address, district) DO UPDATE SET cnt = cnt + excluded.cnt", (upto,))
+            return
 
-        # VACUUM (需要約等同 DB 大小的額外磁碟空間)
-        log_print('  🗜  壓縮資料庫...')
+        log_print('  🔢 彙總地址交易筆數...')
+        cursor.execute('DROP TABLE IF EXISTS address_counts')
+        cursor.execute('CREATE TABLE address_counts ('
+                       'address TEXT NOT NULL, district TEXT NOT NULL, cnt INTEGER NOT NULL, '
+                       'PRIMARY KEY (address, district)) WITHOUT ROWID')
+        cursor.execute(
+            "INSERT INTO address_counts (address, district, cnt) "
+            "SELECT address, COALESCE(district, ''), COUNT(*) FROM land_transaction "
+            "WHERE address != '' GROUP BY 1, 2")
+
+    def _compact(self, vacuum: Optional[bool]):
+        """
+        VACUUM (需要約等同 DB 大小的額外磁碟空間，且會重寫整個檔案)。
+        重建: VACUUM INTO 新檔後替換 (見 _vacuum_into)；增量: 原地 VACUUM，讀取端持續可用。
+        vacuum=None: 空頁 (freelist) 佔比達 _VACUUM_FREE_RATIO 才值得重寫；
+        未達門檻但有空頁且為 incremental auto_vacuum → incremental_vacuum 只截掉空頁。
+        """
+        conn = self.conn
+        free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        auto = vacuum is None
+        if auto:
+            page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+            ratio = free_pages / max(page_count, 1)
+            vacuum = ratio >= _VACUUM_FREE_RATIO
+            if not vacuum:
+                log_print(f'  ⏭  空頁 {free_pages:,}/{page_count:,} ({ratio:.1%})，略過 VACUUM')
         try:
-            self.conn.execute('PRAGMA journal_mode=DELETE')
-            self.conn.commit()
-            self.conn.execute('VACUUM')
+            if vacuum and self._rebuild:
+                log_print('  🗜  壓縮資料庫...')
+                self._vacuum_into()
+            elif vacuum:
+                # 增量匯入: 原地 VACUUM。替換檔案對已開啟的讀取端不可見 (仍讀被刪除的舊檔)，
+                # 原地 VACUUM 經 WAL 提交，查詢服務不中斷即可看到壓縮後的內容
+                log_print('  🗜  壓縮資料庫 (原地)...')
+                conn.commit()
+                conn.execute('VACUUM')
+                conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            elif auto and free_pages \
+                    and conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+                # 每個 step 只歸還一頁；sqlite3 模組對無結果欄的 PRAGMA 只 step 一次 → 用 executescript 執行到底
+                conn.executescript('PRAGMA incremental_vacuum')
+                log_print(f'  🗜  incremental_vacuum: 歸還 {free_pages:,} 空頁')
         except sqlite3.OperationalError as e:
             log_print(f'  ⚠️  VACUUM 失敗 ({e})，跳過壓縮 (不影響資料完整性)')
-        finally:
-            self.conn.execute('PRAGMA journal_mode=WAL')
-            self.conn.execute('PRAGMA locking_mode=NORMAL')  # 恢復正常鎖定模式
-            self.conn.execute('PRAGMA synchronous=NORMAL')    # 確保安全同步
-            self.conn.commit()
 
-    def print_stats(self):
-        """印出匯入統計"""
-        s = self._stats
-        cur = self.conn.cursor()
-        total = cur.execute('SELECT COUNT(*) FROM land_transaction').fetchone()[0]
-        has_city = cur.execute(
-            'SELECT COUNT(*) FROM land_transaction '
-            'WHERE county_city IS NOT NULL AND county_city != ""'
-        ).fetchone()[0]
-        has_geo = cur.execute(
-            'SELECT COUNT(*) FROM land_transaction '
-            'WHERE lat IS NOT NULL AND lat != 0'
-        ).fetchone()[0]
-        has_comm = cur.execute(
-            'SELECT COUNT(*) FROM land_transaction '
-            'WHERE community_name IS NOT NULL AND community_name != ""'
-        ).fetchone()[0]
-        has_street = cur.execute(
-            'SELECT COUNT(*) FROM land_transaction '
-            'WHERE street IS NOT NULL AND street != ""'
-        ).fetchone()[0]
+    def _update_stats(self):
+        """
+        ANALYZE: analysis_limit 限制每個索引的取樣列數 (統計品質足夠，成本遠低於全掃)。
+        重建或有索引缺統計 (剛重建的索引) → 只 ANALYZE land_transaction
+        (不掃 FTS5 shadow 表等查詢不需統計的表)；否則 PRAGMA optimize 只補過期的表。
+        """
+        log_print('  📊 更新統計資訊...')
+        self.conn.execute('PRAGMA analysis_limit=1000')
+        if self._rebuild or self._indexes_missing_stats():
+            self.conn.execute('ANALYZE land_transaction')
+        else:
+            self.conn.execute('PRAGMA optimize')
+        self.conn.commit()
 
-        pct = lambda n: n / total * 100 if total else 0
-        db_size = os.path.getsize(self.db_path) / 1024 / 1024
+    def _vacuum_into(self):
+        """
+        VACUUM INTO 暫存檔 → fsync → 原子替換原檔 → 重新連線。
+        直接寫入全新檔案，不需切換 journal_mode，也不經過原 DB 的 WAL；
+        壓縮期間原檔照常可讀，失敗或中斷時只需刪掉暫存檔，原檔不受影響。
+        僅用於重建: 已開啟原檔的其他程序不會看到替換後的新檔。
+        """
+        tmp_path = self.db_path + '.compact'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        self.conn.commit()
+        try:
+            self.conn.execute('VACUUM INTO ?', (tmp_path,))
+            # 替換前確保新檔內容已落盤，否則斷電後可能留下改名成功但內容不完整的檔案
+            fd = os.open(tmp_path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.conn.close()
+        os.replace(tmp_path, self.db_path)
+        # 舊檔的 WAL/SHM 不可套用到新檔
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(self.db_path + suffix):
+                os.remove(self.db_path + suffix)
+        self.conn = sqlite3.connect(self.db_path, isolation_level='IMMEDIATE',
+                                    cached_statements=_STMT_CACHE_SIZE)
+
+    def print_stats(self, summary: bool = True, overview: bool = True):
+        """
+        印出匯入統計。
+        summary:  本次匯入計數 (來自 _stats，不查 DB)
+        overview: 資料庫總覽 (需全表掃描一次；多檔匯入時只在最後印一次)
+        """
+        if summary:
+            self._print_import_summary()
+        if overview:
+            self._print_overview()
 
+    def _print_import_summary(self):
+        s = self._stats
         log_print(f'\n📊 本次匯入統計:')
         log_print(f'  掃描:    {s["total_scanned"]:,}')
         log_print(f'  新增:    {s["inserted"]:,}')
@@ -1146,8 +1695,24 @@ class LandDataDB:
                       f'丟棄={self._verbose_count["discarded"]} '
                       f'補充={self._verbose_count["enriched"]} '
                       f'重複={self._verbose_count["duplicated"]})')
-        
-        # 最後顯示資料庫總覽
+
+    def _print_overview(self):
+        cur = self.conn.cursor()
+        # 單次全表掃描，以條件聚合同時計算各項覆蓋率
+        total, has_city, has_geo, has_comm, has_street = (
+            v or 0 for v in cur.execute(
+                "SELECT COUNT(*), "
+                "SUM(county_city IS NOT NULL AND county_city != ''), "
+                "SUM(lat IS NOT NULL AND lat != 0), "
+                "SUM(community_name IS NOT NULL AND community_name != ''), "
+                "SUM(street IS NOT NULL AND street != '') "
+                "FROM land_transaction"
+            ).fetchone()
+        )
+
+        pct = lambda n: n / total * 100 if total else 0
+        db_size = os.path.getsize(self.db_path) / 1024 / 1024
+
         log_print(f'\n📦 資料庫總覽:')
         log_print(f'  總筆數:        {total:,}')
         log_print(f'  有縣市名:      {has_city:,} ({pct(has_city):.1f}%)')
@@ -1162,6 +1727,12 @@ class LandDataDB:
 
     def close(self):
         if self.conn:
+            self.conn.commit()  # skip_finalize 時載入階段交易在此提交
+            if self._finalized:
+                # 關閉前補上本連線查詢中發現需要的統計 (通常為 no-op)
+                self.conn.execute('PRAGMA optimize')
+            if self._journal_off:  # skip_finalize: 仍須把 journal 切回 WAL
+                self._tune_for_serving()
             self.conn.close()
             self.conn = None
 
@@ -1182,11 +1753,7 @@ def _parse_csv_row(row: list) -> Optional[dict]:
     parsed = parse_address(raw_address, row[0])
 
     # 預計算 dedup key (避免 fast_insert_records 重複正規化)
-    addr_norm = strip_city(norm_addr_simple(raw_address)) if raw_address else ''
-    date_str = row[7]
-    d = date_str.replace('/', '')[:7] if date_str else ''
-    price = safe_int(row[21]) or 0
-    _dedup_key = f"{d}|{addr_norm}|{price}" if addr_norm else None
+    _dedup_key = make_dedup_key(dedup_date_part(row[7]), raw_address, safe_int(row[21]) or 0)
 
     return {
         'raw_district':      row[0],
@@ -1238,30 +1805,54 @@ def _parse_csv_row(row: list) -> Optional[dict]:
     }
 
 
-def _parse_csv_row_fast(row: list):
+# 低基數文字欄位 (行政區、交易標的、建物型態、主要用途…) 的 CSV 欄位位置:
+# sys.intern 後同值字串共用一個物件，批次 tuple 不再各自持有一份副本
+_INTERN_CSV_COLS = (0, 1, 4, 5, 6, 11, 12, 13, 19, 20, 23, 31)
+
+
+# LVR CSV 數值欄位位置 (以 itemgetter 一次取出後 map 轉型)
+_CSV_FLOAT_COLS = operator.itemgetter(3, 15, 22, 24, 28, 29, 30)
+_CSV_INT_COLS = operator.itemgetter(16, 17, 18, 21, 25)
+
+
+def _parse_csv_row_fast(row: list, normed: Optional[Dict[str, str]] = None):
     """
     將一列 LVR CSV → (values_tuple, dedup_key) 快速版。
     直接產生 INSERT 用的 tuple，避免 dict 創建 + 再提取的開銷。
+    normed: 地址欄 → normalize_address 結果 (由 _parse_csv_chunk 整欄批次算好)，
+            命中時 parse_address 與去重鍵共用同一份正規化結果。
     回傳 None 表示跳過。
     """
-    while len(row) < 33:
-        row.append('')
+    if len(row) < 33:
+        row.extend([''] * (33 - len(row)))
+    for i in _INTERN_CSV_COLS:
+        row[i] = sys.intern(row[i])
+
+    (land_area, building_area, unit_price, parking_area,
+     main_area, attached_area, balcony_area) = map(safe_float, _CSV_FLOAT_COLS(row))
+    rooms, halls, bathrooms, total_price, parking_price = map(safe_int, _CSV_INT_COLS(row))
 
     raw_address = row[2]
-    parsed = parse_address(raw_address, row[0])
+    norm = normed.get(raw_address) if normed else None
+    if norm:
+        parsed = parse_address(norm, row[0], normalized=True)
+        addr_norm = norm.replace(' ', '')
+    else:
+        parsed = parse_address(raw_address, row[0])
+        addr_norm = None
+    county_city = parsed['county_city']
+    district = parsed['district']
 
     # 預計算 dedup key
-    addr_norm = strip_city(norm_addr_simple(raw_address)) if raw_address else ''
-    d = row[7].replace('/', '')[:7] if row[7] else ''
-    price = safe_int(row[21]) or 0
-    dedup_key = f"{d}|{addr_norm}|{price}" if addr_norm else None
+    dedup_key = make_dedup_key(dedup_date_part(row[7]), raw_address, total_price or 0,
+                               addr_norm)
 
     # 直接建立與 LAND_COLUMNS + ['dedup_key'] 對應的 tuple
     return (
         row[0],                          # raw_district
         row[1],                          # transaction_type
-        row[2],                          # address
-        safe_float(row[3]),              # land_area
+        raw_address,                     # address
+        land_area,                       # land_area
         row[4],                          # urban_zone
         row[5],                          # non_urban_zone
         row[6],                          # non_urban_use
@@ -1273,26 +1864,26 @@ def _parse_csv_row_fast(row: list):
         row[12],                         # main_use
         row[13],                         # main_material
         row[14],                         # build_date
-        safe_float(row[15]),             # building_area
-        safe_int(row[16]),               # rooms
-        safe_int(row[17]),               # halls
-        safe_int(row[18]),               # bathrooms
+        building_area,                   # building_area
+        rooms,                           # rooms
+        halls,                           # halls
+        bathrooms,                       # bathrooms
         row[19],                         # partitioned
         row[20],                         # has_management
-        safe_int(row[21]),               # total_price
-        safe_float(row[22]),             # unit_price
+        total_price,                     # total_price
+        unit_price,                      # unit_price
         row[23],                         # parking_type
-        safe_float(row[24]),             # parking_area
-        safe_int(row[25]),               # parking_price
+        parking_area,                    # parking_area
+        parking_price,                   # parking_price
         row[26],                         # note
         row[27],                         # serial_no
-        safe_float(row[28]),             # main_area
-        safe_float(row[29]),             # attached_area
-        safe_float(row[30]),             # balcony_area
+        main_area,                       # main_area
+        attached_area,                   # attached_area
+        balcony_area,                    # balcony_area
         row[31],                         # elevator
-        row[32] if len(row) > 32 else '',  # transfer_no
-        parsed['county_city'],           # county_city
-        parsed['district'],              # district
+        row[32],                         # transfer_no
+        sys.intern(county_city) if county_city else county_city,  # county_city
+        sys.intern(district) if district else district,           # district
         parsed['village'],               # village
         parsed['street'],                # street
         parsed['lane'],                  # lane
@@ -1307,6 +1898,11 @@ def _parse_csv_row_fast(row: list):
     )
 
 
+# raw_json 內使用到的鍵 (以 map(j.get, ...) 一次取值，取代逐欄 j.get(k, '') or '')
+_API_JSON_KEYS = ('f', 't', 'j', 'k', 'l', 'm', 'pu', 'AA11', 'b', 'note',
+                  'tp', 'p', 'cp', 's', 'lat', 'lon')
+
+
 def _parse_api_row(row) -> Optional[dict]:
     """
     將 transactions.db 一列 → 標準 record dict。
@@ -1316,17 +1912,19 @@ def _parse_api_row(row) -> Optional[dict]:
         date_str, floor_col, area_col, tp_raw, up_raw, \
         lat, lon, sq, rj_text = row
 
+    # 地址清洗 (先過濾，缺號的列不必解析 JSON)
+    addr_clean = clean_trans_addr(addr_raw)
+    if not addr_clean or '號' not in addr_clean:
+        return None
+
     j = {}
     if rj_text:
         try:
             j = json.loads(rj_text)
         except Exception:
             pass
-
-    # 地址清洗
-    addr_clean = clean_trans_addr(addr_raw)
-    if not addr_clean or '號' not in addr_clean:
-        return None
+    (j_f, j_t, j_j, j_k, j_l, j_m, j_pu, j_aa11, j_b, j_note,
+     j_tp, j_p, j_cp, j_s, j_lat, j_lon) = map(j.get, _API_JSON_KEYS)
 
     # 用 city_code 取得 city_hint → 精確消歧
     city_hint = CITY_CODE_MAP.get(city_code, '')
@@ -1336,42 +1934,41 @@ def _parse_api_row(row) -> Optional[dict]:
     transaction_date = normalize_date(date_str)
 
     # 樓層
-    floor_json = j.get('f', '') or floor_col or ''
+    floor_json = j_f or floor_col or ''
     floor_level, total_floors = parse_floor_info(floor_json)
 
     # JSON 欄位
-    transaction_type = j.get('t', '') or ''
-    rooms = safe_int(j.get('j'))
-    halls = safe_int(j.get('k'))
-    bathrooms = safe_int(j.get('l'))
-    has_management = j.get('m', '') or ''
-    main_use = j.get('pu', '') or j.get('AA11', '') or ''
-    building_type_j = build_type or j.get('b', '') or ''
-    note = j.get('note', '') or ''
+    transaction_type = j_t or ''
+    rooms = safe_int(j_j)
+    halls = safe_int(j_k)
+    bathrooms = safe_int(j_l)
+    has_management = j_m or ''
+    main_use = j_pu or j_aa11 or ''
+    building_type_j = build_type or j_b or ''
+    note = j_note or ''
 
     # ⚠ transactions.db 欄位名不符實際內容:
     #   DB total_price 實際存的是 JSON 'p' (每坪單價, 如 '721,048')
     #   DB unit_price  實際存的是 JSON 'v' (房型格局, 如 '2房2廳2衛')
     # 正確來源: JSON 'tp' = 總價, JSON 'p' = 每坪單價
-    total_price = parse_price(j.get('tp')) or parse_price(tp_raw)
-    unit_price = safe_float(j.get('p')) or safe_float(j.get('cp'))
+    total_price = parse_price(j_tp) or parse_price(tp_raw)
+    unit_price = safe_float(j_p) or safe_float(j_cp)
     # API DB stores area in Ping, but our DB expects SQM. Convert Ping back to SQM (1 Ping = 3.305785 sqm)
-    area_ping = safe_float(area_col) or safe_float(j.get('s'))
+    area_ping = safe_float(area_col) or safe_float(j_s)
     building_area = area_ping * 3.305785 if area_ping else None
 
     serial_no = f'api_{sq}' if sq else None
 
     # 預計算 dedup_key (與 CSV 路徑一致: date[:7]|strip_city(norm(addr))|total_price)
-    addr_norm = strip_city(norm_addr_simple(addr_clean)) if addr_clean else ''
-    d = transaction_date.replace('/', '')[:7] if transaction_date else ''
-    _dedup_key = f"{d}|{addr_norm}|{int(total_price or 0)}" if addr_norm else None
+    # normalize_date 已去除 '/'
+    _dedup_key = make_dedup_key(transaction_date[:7], addr_clean, int(total_price or 0))
 
     lat_val = lat if (lat and lat != 0) else None
     lng_val = lon if (lon and lon != 0) else None
-    if not lat_val and j.get('lat'):
-        lat_val = j['lat']
-    if not lng_val and j.get('lon'):
-        lng_val = j['lon']
+    if not lat_val and j_lat:
+        lat_val = j_lat
+    if not lng_val and j_lon:
+        lng_val = j_lon
 
     floor_parsed = parsed['floor']
     if not floor_parsed and floor_level:
@@ -1437,7 +2034,7 @@ def _parse_api_record(row):
     rec = _parse_api_row(row)
     if rec is None:
         return None
-    return tuple(rec.get(col) for col in LAND_COLUMNS)
+    return _record_values(rec)
 
 
 def _parse_land_db_row(row, col_names: list) -> Optional[dict]:
@@ -1525,13 +2122,18 @@ _GENERIC_CSV_MAP = {
     'community': 'community_name', 'lat': 'lat', 'lng': 'lng', 'lon': 'lng',
 }
 
+# header 正規化: 單次 translate 去除所有空白 (含全形空白、BOM)、全形括號轉半形
+_HEADER_TRANS = str.maketrans({' ': None, '\t': None, '\u3000': None, '\ufeff': None,
+                               '（': '(', '）': ')'})
+_GENERIC_CSV_MAP = {k.translate(_HEADER_TRANS): v for k, v in _GENERIC_CSV_MAP.items()}
+
 
 def _build_generic_csv_map(headers: list) -> dict:
-    """從 CSV header 建立欄位映射"""
+    """從 CSV header 建立欄位映射 (header 以 _HEADER_TRANS 正規化後直接查表)"""
     mapping = {}
     indices = {}
     for i, h in enumerate(headers):
-        h_clean = h.strip()
+        h_clean = h.translate(_HEADER_TRANS)
         if h_clean in _GENERIC_CSV_MAP:
             land_col = _GENERIC_CSV_MAP[h_clean]
             mapping[h_clean] = land_col
@@ -1544,8 +2146,85 @@ def _build_generic_csv_map(headers: list) -> dict:
 # 第六層: 匯入引擎 (讀取各來源 → 呼叫 db.upsert_record)
 # ═══════════════════════════════════════════════════════════════════════════════
 
+_CSV_READ_BUFFER = 1 << 20  # 1 MiB
+
+
+def _open_csv(csv_path: str):
+    """
+    以大緩衝區開啟 CSV 供 csv.reader 循序讀取。
+    二進位 1 MiB 緩衝 + TextIOWrapper 解碼 (去 BOM)，並提示核心循序預讀。
+    """
+    raw = open(csv_path, 'rb', buffering=_CSV_READ_BUFFER)
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(raw.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+    return io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+
+
+def _worker_count() -> int:
+    """解析用 worker 行程數: --jobs 指定值，否則 CPU 核心數"""
+    return _PARSE_JOBS or os.cpu_count() or 1
+
+
+def _imap_chunks(func, chunks, chunk_size: int):
+    """
+    依原順序逐一產出 func(chunk) (純 CPU 的解析工作)。
+    第一個分片已滿 (資料量超過一個分片) 且多核心時交給 worker 行程，否則在主行程處理。
+    最多只預送 2 × worker 數的分片 — Pool.imap 會一口氣讀完整個輸入，大檔會整份進記憶體。
+    順序保持與單行程一致 (去重/補充結果取決於輸入順序)。
+    """
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    if first is None:
+        return
+    chunks = itertools.chain([first], chunks)
+    n_workers = _worker_count()
+    if len(first) < chunk_size or n_workers < 2:
+        yield from map(func, chunks)
+        return
+
+    import multiprocessing  # 延後載入: 小檔 / 單核心 / --help 不必付出載入成本
+    pool = multiprocessing.Pool(n_workers)
+    done = False
+    try:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(func, (chunk,)))
+            if len(pending) >= 2 * n_workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+        done = True
+    finally:
+        if done:
+            pool.close()
+        else:
+            pool.terminate()  # 中途失敗: 不等待尚未完成的分片
+        pool.join()
+
+
+_CSV_PARSE_CHUNK = 20000  # 每個 worker 任務的 CSV 列數
+
+
+def _parse_csv_chunk(rows: list) -> Tuple[int, list]:
+    """
+    worker: 一批 LVR CSV 列 → (列數, tuple list)，略過無法解析的列。
+    地址欄先以 normalize_addresses 整欄批次正規化 (僅頭尾無空白者，
+    與 parse_address 內先 strip 的結果一致)，每列不再各自正規化兩次。
+    """
+    addrs = list({r[2] for r in rows if len(r) > 2 and r[2] and r[2] == r[2].strip()})
+    normed = dict(zip(addrs, normalize_addresses(addrs)))
+    return len(rows), [tup for tup in (_parse_csv_row_fast(r, normed) for r in rows) if tup]
+
+
 def import_csv_lvr(db: LandDataDB, csv_path: str):
-    """匯入 LVR 實價登錄 CSV (使用極速 tuple 插入)"""
+    """
+    匯入 LVR 實價登錄 CSV (使用極速 tuple 插入)。
+    解析 + 正規化 + dedup_key 為純 CPU 運算 → 每 _CSV_PARSE_CHUNK 列交給 worker 行程
+    (見 _imap_chunks)，主行程只負責寫入 SQLite。
+    """
     log_print(f'\n📄 [CSV-LVR] 匯入: {csv_path}')
     t0 = time.time()
 
@@ -1553,20 +2232,17 @@ def import_csv_lvr(db: LandDataDB, csv_path: str):
     batch_size = db.BATCH_SIZE
     total = 0
 
-    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+    with _open_csv(csv_path) as f:
         reader = csv.reader(f)
         next(reader, None)  # 中文標頭
         next(reader, None)  # 英文標頭
 
-        for row in reader:
-            tup = _parse_csv_row_fast(row)
-            if tup:
-                batch.append(tup)
-
-            total += 1
+        chunks = iter(lambda: list(itertools.islice(reader, _CSV_PARSE_CHUNK)), [])
+        for n_rows, tuples in _imap_chunks(_parse_csv_chunk, chunks, _CSV_PARSE_CHUNK):
+            batch.extend(tuples)
+            total += n_rows
             if len(batch) >= batch_size:
                 db.fast_insert_tuples(batch)
-                db.conn.commit()
                 batch = []
 
                 elapsed = time.time() - t0
@@ -1579,7 +2255,6 @@ def import_csv_lvr(db: LandDataDB, csv_path: str):
 
     if batch:
         db.fast_insert_tuples(batch)
-        db.conn.commit()
 
     elapsed = time.time() - t0
     log_print(f'  ✅ CSV-LVR 完成: {elapsed:.1f}s')
@@ -1590,7 +2265,7 @@ def import_csv_generic(db: LandDataDB, csv_path: str):
     log_print(f'\n📄 [CSV-Generic] 匯入: {csv_path}')
     t0 = time.time()
 
-    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+    with _open_csv(csv_path) as f:
         reader = csv.reader(f)
         headers = next(reader, [])
         header_map = _build_generic_csv_map(headers)
@@ -1603,13 +2278,16 @@ def import_csv_generic(db: LandDataDB, csv_path: str):
         mapped = {k: v for k, v in header_map.items() if k != '_indices'}
         log_print(f'  欄位映射: {mapped}')
 
+        batch = []
+        batch_size = db.BATCH_SIZE
         for i, row in enumerate(reader, 1):
             rec = _parse_generic_csv_row(row, header_map)
             if rec:
-                db.upsert_record(rec)
+                batch.append(rec)
 
-            if i % 10000 == 0:
-                db.flush_all()
+            if len(batch) >= batch_size:
+                db.fast_insert_records(batch)
+                batch = []
                 elapsed = time.time() - t0
                 s = db._stats
                 log_print(f'  ⏳ {i:,} 筆 | 新增 {s["inserted"]:,} | '
@@ -1617,46 +2295,92 @@ def import_csv_generic(db: LandDataDB, csv_path: str):
                       f'丟棄 {s["discarded"]:,} ({elapsed:.0f}s)',
                       flush=True)
 
-    db.flush_all()
+    if batch:
+        db.fast_insert_records(batch)
     elapsed = time.time() - t0
     log_print(f'  ✅ CSV-Generic 完成: {elapsed:.1f}s')
 
 
+_API_PARSE_CHUNK = 20000  # 每個 worker 任務的 API DB 列數 (= 每頁列數)
+_LAND_DB_PAGE = 50000     # import_land_db 每頁列數
+
+
+def _iter_keyset_pages(cursor, sql: str, page: int, id_pos: int = 0):
+    """
+    以 keyset 分頁 (`id > ? ORDER BY id LIMIT ?`) 逐頁讀取來源表，每頁為一個 list。
+    sql 須以 `id > ? ORDER BY id LIMIT ?` 結尾；id_pos 為結果列中 id 的位置。
+    每頁都是獨立的短查詢 (走 rowid B-tree seek)，不必讓單一 cursor 橫跨整次匯入。
+    """
+    last_id = 0
+    while True:
+        rows = cursor.execute(sql, (last_id, page)).fetchall()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page:
+            return
+        last_id = rows[-1][id_pos]
+
+
+def _parse_api_chunk(rows: list) -> Tuple[int, list]:
+    """worker: 一批 transactions 列 → (列數, record list)，無法解析的列略過"""
+    records = []
+    for row in rows:
+        try:
+            rec = _parse_api_row(row)
+        except Exception:
+            rec = None
+        if rec:
+            records.append(rec)
+    return len(rows), records
+
+
 def import_api_db(db: LandDataDB, api_db_path: str):
-    """匯入 API transactions DB (使用批次快速插入)"""
+    """
+    匯入 API transactions DB (使用批次快速插入)。
+    raw_json 解析 + 地址正規化以 _API_PARSE_CHUNK 列為單位交給 worker 行程 (見 _imap_chunks)。
+    """
     log_print(f'\n🌐 [API-DB] 匯入: {api_db_path}')
     t0 = time.time()
 
     conn_t = sqlite3.connect(api_db_path)
     conn_t.text_factory = lambda b: b.decode('utf-8', errors='replace')
     ct = conn_t.cursor()
-    ct.execute(
+
+    # 缺「號」的地址在 _parse_api_row 必被丟棄 → 直接在 SQLite 端排除，
+    # 不必把整列 (含 raw_json) 搬進 Python；僅計數以維持統計一致
+    n_skip = ct.execute(
+        "SELECT COUNT(*) FROM transactions "
+        "WHERE address IS NULL OR instr(address, '號') = 0"
+    ).fetchone()[0]
+    if n_skip:
+        db._stats['discarded'] += n_skip
+        db._stats['discard_parse_err'] += n_skip
+        db._stats['total_scanned'] += n_skip
+
+    sql = (
         'SELECT id, city, town, address, build_type, community, date_str, '
         'floor, area, total_price, unit_price, lat, lon, sq, raw_json '
-        'FROM transactions'
+        "FROM transactions WHERE instr(address, '號') > 0 "
+        'AND id > ? ORDER BY id LIMIT ?'
     )
 
     batch = []
     batch_size = db.BATCH_SIZE
-    total = 0
-
-    for row in ct:
-        total += 1
-        try:
-            rec = _parse_api_row(row)
-        except Exception:
-            rec = None
-
-        if rec:
-            batch.append(rec)
-        else:
-            db._stats['discarded'] += 1
-            db._stats['discard_parse_err'] += 1
-            db._stats['total_scanned'] += 1
+    total = n_skip
+
+    chunks = _iter_keyset_pages(ct, sql, _API_PARSE_CHUNK)
+    for n_rows, records in _imap_chunks(_parse_api_chunk, chunks, _API_PARSE_CHUNK):
+        total += n_rows
+        n_err = n_rows - len(records)
+        if n_err:
+            db._stats['discarded'] += n_err
+            db._stats['discard_parse_err'] += n_err
+            db._stats['total_scanned'] += n_err
+        batch.extend(records)
 
         if len(batch) >= batch_size:
             db.fast_insert_records(batch)
-            db.conn.commit()
             batch = []
 
             elapsed = time.time() - t0
@@ -1669,7 +2393,6 @@ def import_api_db(db: LandDataDB, api_db_path: str):
 
     if batch:
         db.fast_insert_records(batch)
-        db.conn.commit()
 
     conn_t.close()
     elapsed = time.time() - t0
@@ -1678,7 +2401,7 @@ def import_api_db(db: LandDataDB, api_db_path: str):
 
 def import_land_db(db: LandDataDB, source_db_path: str):
     """從另一個 land_data.db 匯入 (合併兩個 land_data.db)"""
-    print(f'\n📦 [LAND-DB] 匯入: {source_db_path}')
+    log_print(f'\n📦 [LAND-DB] 匯入: {source_db_path}')
     t0 = time.time()
 
     conn_s = sqlite3.connect(source_db_path)
@@ -1688,46 +2411,54 @@ def import_land_db(db: LandDataDB, source_db_path: str):
     cur_s.execute('PRAGMA table_info(land_transaction)')
     col_names = [row[1] for row in cur_s.fetchall()]
 
-    cur_s.execute('SELECT * FROM land_transaction')
+    sql = 'SELECT * FROM land_transaction WHERE id > ? ORDER BY id LIMIT ?'
+    pages = _iter_keyset_pages(cur_s, sql, _LAND_DB_PAGE, col_names.index('id'))
 
-    for i, row in enumerate(cur_s, 1):
+    batch = []
+    batch_size = db.BATCH_SIZE
+    i = 0
+    for row in itertools.chain.from_iterable(pages):
+        i += 1
         try:
             rec = _parse_land_db_row(row, col_names)
         except Exception:
             rec = None
 
         if rec:
-            db.upsert_record(rec)
+            batch.append(rec)
         else:
             db._stats['discarded'] += 1
             db._stats['total_scanned'] += 1
 
-        if i % 10000 == 0:
-            db.flush_all()
+        if len(batch) >= batch_size:
+            db.fast_insert_records(batch)
+            batch = []
             elapsed = time.time() - t0
             s = db._stats
-            print(f'  ⏳ {i:,} 筆 | 新增 {s["inserted"]:,} | '
+            log_print(f'  ⏳ {i:,} 筆 | 新增 {s["inserted"]:,} | '
                   f'補充 {s["enriched"]:,} | 重複 {s["duplicated"]:,} | '
                   f'丟棄 {s["discarded"]:,} ({elapsed:.0f}s)',
                   flush=True)
 
-    db.flush_all()
+    if batch:
+        db.fast_insert_records(batch)
     conn_s.close()
     elapsed = time.time() - t0
-    print(f'  ✅ LAND-DB 完成: {elapsed:.1f}s')
+    log_print(f'  ✅ LAND-DB 完成: {elapsed:.1f}s')
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # 第七層: 主流程
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def import_file(db: LandDataDB, filepath: str):
+def import_file(db: LandDataDB, filepath: str) -> Optional[SourceType]:
     """
     自動偵測並匯入單一檔案。
+    回傳偵測到的來源類型 (檔案不存在時為 None)，供呼叫端免再偵測一次。
     """
     if not os.path.exists(filepath):
         log_print(f'  ❌ 檔案不存在: {filepath}')
-        return
+        return None
 
     source_type = detect_source(filepath)
     log_print(f'  🔍 偵測到來源類型: {source_type.value}')
@@ -1744,16 +2475,26 @@ def import_file(db: LandDataDB, filepath: str):
         source_real = os.path.realpath(filepath)
         if target_real == source_real:
             log_print(f'  ⚠️  來源與目標是同一個檔案，跳過')
-            return
+            return source_type
         import_land_db(db, filepath)
     else:
         log_print(f'  ❌ 無法識別的資料來源格式: {filepath}')
-        return
+    return source_type
+
+
+# 預配置大小 = 輸入檔總大小 × 此倍率 (land_data.db 含索引約為 CSV 的 1.5 倍)
+_PRESIZE_RATIO = 1.5
+# 增量匯入: 預估新增資料 ≥ 既有 DB 大小 × 此比例時才暫移次要索引 (finalize 重建)
+_DEFER_INDEX_MIN_RATIO = 0.1
 
 
 def convert_v4(input_files: List[str], target_path: str,
                rebuild: bool = False, skip_finalize: bool = False,
-               verbose: bool = False):
+               verbose: bool = False, vacuum: Optional[bool] = None,
+               presize: bool = False,
+               input_sizes: Optional[Dict[str, int]] = None,
+               pragmas: Optional[Dict[str, Any]] = None,
+               jobs: Optional[int] = None):
     """
     主要轉換流程 (v4)。
 
@@ -1762,9 +2503,15 @@ def convert_v4(input_files: List[str], target_path: str,
         target_path:    目標 land_data.db 路徑
         rebuild:        是否重建 (刪除舊 DB)
         skip_finalize:  跳過索引/FTS/VACUUM (多批匯入時最後再做)
+        vacuum:         finalize 時是否 VACUUM (None = 依空頁比例自動決定)
+        presize:        新建 DB 時依輸入檔大小預配置檔案空間
+        input_sizes:    {路徑: 位元組數}，呼叫端已 stat 過時傳入以免重複 stat
+        pragmas:        匯入階段 PRAGMA 覆寫 (見 LandDataDB.__init__)
+        jobs:           解析 worker 行程數 (None = CPU 核心數；1 = 單行程)
     """
-    global _VERBOSE
+    global _VERBOSE, _PARSE_JOBS
     _VERBOSE = verbose
+    _PARSE_JOBS = jobs
 
     log_path = os.path.join(os.path.dirname(target_path), 'land_data_import.log')
     init_logging(log_path)
@@ -1780,8 +2527,13 @@ def convert_v4(input_files: List[str], target_path: str,
         log_print(f'  詳細log: 開啟 (每種類型前 {_VERBOSE_MAX} 筆範例)')
     log_print(f'{"=" * 60}')
 
-    db = LandDataDB(target_path)
-    db.open(rebuild=rebuild)
+    sizes = input_sizes or {}
+    incoming_bytes = sum((sizes[f] if f in sizes else _stat_size(f)) or 0
+                         for f in input_files)
+    presize_bytes = int(incoming_bytes * _PRESIZE_RATIO) if presize else 0
+
+    db = LandDataDB(target_path, pragmas=pragmas)
+    db.open(rebuild=rebuild, presize_bytes=presize_bytes, incoming_bytes=incoming_bytes)
 
     t0 = time.time()
 
@@ -1790,13 +2542,12 @@ def convert_v4(input_files: List[str], target_path: str,
 
     for filepath in input_files:
         db.reset_stats()
-        import_file(db, filepath)
-        # 確保 flush all samples before printing stats
-        db.flush_all()
-        db.print_stats()
+        # 增量模式: 每檔一個交易 (離開區段時 flush + commit，之後才印統計)
+        with db.bulk_load_mode():
+            st = import_file(db, filepath)
+        db.print_stats(overview=False)  # 總覽需全表掃描 → 只在最後印一次
 
         # 記下 API DB 路徑供社區回填
-        st = detect_source(filepath)
         if st == SourceType.API_DB:
             api_db_files.append(filepath)
 
@@ -1808,7 +2559,7 @@ def convert_v4(input_files: List[str], target_path: str,
 
     # 索引/FTS/壓縮
     if not skip_finalize:
-        db.finalize()
+        db.finalize(vacuum=vacuum)
 
     elapsed = time.time() - t0
     log_print(f'\n🎉 全部完成! 耗時 {elapsed:.1f}s')
@@ -1827,8 +2578,7 @@ def convert_v4(input_files: List[str], target_path: str,
         log_print(f'\n✅ 去重驗證通過: 無重複 dedup_key')
 
     # 最終總覽
-    db.reset_stats()
-    db.print_stats()
+    db.print_stats(summary=False)
     db.close()
     
     close_logging()
@@ -1839,12 +2589,12 @@ def convert_v4(input_files: List[str], target_path: str,
 
 def load_csv(conn, csv_path):
     """[向後相容] 舊版 CSV 載入 (直接 INSERT，不做去重)"""
-    print(f'\n📄 [CSV] 載入: {csv_path}')
+    log_print(f'\n📄 [CSV] 載入: {csv_path}')
     cursor = conn.cursor()
     batch, total, parsed_ok = [], 0, 0
     t0 = time.time()
 
-    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+    with _open_csv(csv_path) as f:
         reader = csv.reader(f)
         next(reader, None)
         next(reader, None)
@@ -1883,14 +2633,14 @@ def load_csv(conn, csv_path):
 
     elapsed = time.time() - t0
     pct = parsed_ok / total * 100 if total else 0
-    print(f'\n  ✅ CSV 載入完成: {total:,} 筆, '
+    log_print(f'\n  ✅ CSV 載入完成: {total:,} 筆, '
           f'地址解析率 {pct:.1f}%, {elapsed:.1f}s')
     return total
 
 
 def load_api(conn, api_db_path):
     """[向後相容] 舊版 API 載入 (直接 INSERT，不做去重)"""
-    print(f'\n🌐 [API] 載入: {api_db_path}')
+    log_print(f'\n🌐 [API] 載入: {api_db_path}')
     cursor = conn.cursor()
     conn_t = sqlite3.connect(api_db_path)
     conn_t.text_factory = lambda b: b.decode('utf-8', errors='replace')
@@ -1923,7 +2673,7 @@ def load_api(conn, api_db_path):
         conn.commit()
     conn_t.close()
     elapsed = time.time() - t0
-    print(f'\n  ✅ API 載入完成: 掃描 {total:,}, '
+    log_print(f'\n  ✅ API 載入完成: 掃描 {total:,}, '
           f'插入 {inserted:,}, 略過 {skipped:,}, {elapsed:.1f}s')
     return inserted
 
@@ -1936,42 +2686,39 @@ def create_tables(cursor):
 
 def create_indexes(cursor):
     """[向後相容] 建立索引"""
-    print('  📇 建立索引...')
-    indexes = [
-        ('idx_county_city', 'county_city'),
-        ('idx_district', 'district'),
-        ('idx_street', 'street'),
-        ('idx_lane', 'lane'),
-        ('idx_number', 'number'),
-        ('idx_floor', 'floor'),
-        ('idx_date', 'transaction_date'),
-        ('idx_price', 'total_price'),
-        ('idx_serial', 'serial_no'),
-    ]
-    for name, col in indexes:
-        cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON land_transaction({col})')
-    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_addr_combo
-        ON land_transaction(county_city, district, street, lane, number)''')
-    # com2address 查詢用索引
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_community_address ON land_transaction(community_name, address) WHERE community_name IS NOT NULL AND address IS NOT NULL')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_street_lane_district ON land_transaction(street, lane, district)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_search_numbers ON land_transaction(street, lane, district, total_floors, build_date) WHERE number IS NOT NULL')
+    log_print('  📇 建立索引...')
+    cursor.execute(f'PRAGMA threads={_SORTER_THREADS}')  # 多執行緒 sorter 分擔各索引的排序
+    # 與 LandDataDB.finalize() 建立同一組索引 (SECONDARY_INDEXES)，並移除已被涵蓋的舊索引
+    for name, cols in SECONDARY_INDEXES:
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON land_transaction({cols})')
+    for name in RETIRED_INDEXES:
+        cursor.execute(f'DROP INDEX IF EXISTS {name}')
+    # 新索引沒有 sqlite_stat1 統計時，planner 可能選到單欄索引而非複合索引
+    cursor.execute('PRAGMA analysis_limit=1000')
+    cursor.execute('ANALYZE land_transaction')
 
 
 def create_fts(cursor):
     """[向後相容] 建立 FTS5"""
-    print('  🔍 建立 FTS5 全文檢索...')
-    cursor.execute('DROP TABLE IF EXISTS address_fts')
-    cursor.execute('''
-        CREATE VIRTUAL TABLE address_fts USING fts5(
-            address, content='land_transaction', content_rowid='id',
-            tokenize='unicode61'
-        )
-    ''')
-    cursor.execute('''
-        INSERT INTO address_fts(rowid, address)
-        SELECT id, address FROM land_transaction WHERE address != ''
-    ''')
+    log_print('  🔍 建立 FTS5 全文檢索...')
+    # rebuild 期間 segment 合併需大量隨機讀寫 → 暫時放大 page cache (呼叫端的設定結束後還原)
+    prev_cache = cursor.execute('PRAGMA cache_size').fetchone()[0]
+    prev_temp = cursor.execute('PRAGMA temp_store').fetchone()[0]
+    try:
+        cursor.execute('PRAGMA cache_size=-524288')  # 512MB
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.execute('DROP TABLE IF EXISTS address_fts')
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE address_fts USING fts5(
+                address, content='land_transaction', content_rowid='id',
+                tokenize='{FTS_TOKENIZER}'
+            )
+        ''')
+        cursor.execute("INSERT INTO address_fts(address_fts) VALUES('rebuild')")
+        cursor.execute("INSERT INTO address_fts(address_fts) VALUES('optimize')")
+    finally:
+        cursor.execute(f'PRAGMA cache_size={int(prev_cache)}')
+        cursor.execute(f'PRAGMA temp_store={int(prev_temp)}')
 
 
 def convert(source, csv_path=None, api_path=None, output_path=None):
@@ -1988,7 +2735,39 @@ def convert(source, csv_path=None, api_path=None, output_path=None):
 # CLI
 # ═══════════════════════════════════════════════════════════════════════════════
 
+def _stat_size(path: str) -> Optional[int]:
+    """單次 os.stat 取得檔案大小；檔案不存在回傳 None"""
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError:
+        return None
+
+
+def _db_dir_sizes(paths) -> Dict[str, Optional[int]]:
+    """
+    批次取得多個路徑的檔案大小 (不存在為 None)。
+    位於預設 db/ 目錄的路徑以單次 os.scandir 列出後查表，不存在的檔案不必逐一 stat；
+    其他路徑 (使用者指定) 仍各自 _stat_size。
+    """
+    present = {}
+    if any(os.path.dirname(p) == _DB_DIR for p in paths):
+        try:
+            with os.scandir(_DB_DIR) as it:
+                present = {e.name: e for e in it if e.is_file()}
+        except FileNotFoundError:
+            pass
+    sizes = {}
+    for p in paths:
+        if os.path.dirname(p) == _DB_DIR:
+            entry = present.get(os.path.basename(p))
+            sizes[p] = entry.stat().st_size if entry is not None else None
+        else:
+            sizes[p] = _stat_size(p)
+    return sizes
+
+
 def main():
+    import argparse  # 只有 CLI 需要；被其他模組 import 時不載入
     parser = argparse.ArgumentParser(
         description='台灣實價登錄資料轉換 v4 — 自動識別 + 增量匯入',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -2021,6 +2800,28 @@ def main():
                         help='跳過建索引/FTS/VACUUM (多批時最後再做)')
     parser.add_argument('--verbose', '-v', action='store_true',
                         help='詳細 log: 顯示丟棄/補充/重複的範例記錄')
+    parser.add_argument('--vacuum', action=argparse.BooleanOptionalAction,
+                        default=None,
+                        help='finalize 時是否 VACUUM 壓縮 '
+                             '(預設: 空頁佔比 ≥ 10%% 才執行)')
+    parser.add_argument('--presize', action='store_true',
+                        help='新建 DB 時依輸入檔大小預配置檔案空間')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='CSV / API 解析的 worker 行程數 (預設: CPU 核心數；1 = 單行程)')
+
+    # 匯入階段 PRAGMA (依儲存媒體調整；finalize 後一律恢復 WAL + synchronous=NORMAL)
+    parser.add_argument('--journal-mode', default=None, type=str.upper,
+                        choices=['OFF', 'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL'],
+                        help='匯入期間 journal_mode (預設: 重建 OFF、增量 WAL)。'
+                             'OFF/MEMORY 在程序中斷時可能損毀資料庫')
+    parser.add_argument('--synchronous', default=None, type=str.upper,
+                        choices=['OFF', 'NORMAL', 'FULL', 'EXTRA'],
+                        help='匯入期間 synchronous (預設 OFF)。'
+                             'OFF 在斷電時可能遺失/損毀資料；網路檔案系統建議 FULL')
+    parser.add_argument('--cache-size-mb', type=int, default=None,
+                        help='SQLite 頁快取大小 MB (預設 512)')
+    parser.add_argument('--mmap-size-mb', type=int, default=None,
+                        help='SQLite mmap 大小 MB，0 = 停用 (預設 10240)')
 
     # 向後相容參數
     parser.add_argument('--source', '-s',
@@ -2034,62 +2835,69 @@ def main():
                         help='[向後相容] 同 --target')
 
     args = parser.parse_args()
-
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_dir = os.path.dirname(script_dir)
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs 必須 ≥ 1')
+    pragmas = {
+        'journal_mode': args.journal_mode,
+        'synchronous': args.synchronous,
+        'cache_size_mb': args.cache_size_mb,
+        'mmap_size_mb': args.mmap_size_mb,
+    }
 
     # 目標路徑
-    target_path = (args.target or args.output
-                   or os.path.join(project_dir, 'db', 'land_data.db'))
+    target_path = args.target or args.output or _DEFAULT_TARGET
 
     # —— 向後相容模式: --source csv/api/both ——
     if args.source and not args.inputs:
-        csv_path = args.csv_input or os.path.join(
-            project_dir, 'db', 'ALL_lvr_land_a.csv')
-        api_path = args.api_input or os.path.join(
-            project_dir, 'db', 'transactions_all_original.db')
+        csv_path = args.csv_input or _DEFAULT_CSV
+        api_path = args.api_input or _DEFAULT_API
 
-        input_files = []
+        wanted = []
         if args.source in ('csv', 'both'):
-            if not os.path.exists(csv_path):
-                print(f'❌ 找不到 CSV 檔案: {csv_path}')
-                sys.exit(1)
-            input_files.append(csv_path)
+            wanted.append((csv_path, '找不到 CSV 檔案'))
         if args.source in ('api', 'both'):
-            if not os.path.exists(api_path):
-                print(f'❌ 找不到 API DB: {api_path}')
+            wanted.append((api_path, '找不到 API DB'))
+        sizes = _db_dir_sizes([p for p, _ in wanted])
+        for p, msg in wanted:
+            if sizes[p] is None:
+                print(f'❌ {msg}: {p}')
                 sys.exit(1)
-            input_files.append(api_path)
 
         # 向後相容: --source 模式預設 rebuild
-        convert_v4(input_files, target_path, rebuild=True, verbose=args.verbose)
+        convert_v4(list(sizes), target_path, rebuild=True, verbose=args.verbose,
+                   vacuum=args.vacuum, presize=args.presize, input_sizes=sizes,
+                   pragmas=pragmas, jobs=args.jobs)
         return
 
     # —— 新版模式: positional inputs ——
     if not args.inputs:
         # 無輸入 → 預設 both
-        csv_path = os.path.join(project_dir, 'db', 'ALL_lvr_land_a.csv')
-        api_path = os.path.join(project_dir, 'db', 'transactions_all_original.db')
-        input_files = []
-        if os.path.exists(csv_path):
-            input_files.append(csv_path)
-        if os.path.exists(api_path):
-            input_files.append(api_path)
-        if not input_files:
+        sizes = {p: n for p, n in _db_dir_sizes((_DEFAULT_CSV, _DEFAULT_API)).items()
+                 if n is not None}
+        if not sizes:
             print('❌ 找不到預設輸入檔案，請指定輸入路徑')
             parser.print_help()
             sys.exit(1)
-        convert_v4(input_files, target_path, rebuild=True, verbose=args.verbose)
+        convert_v4(list(sizes), target_path, rebuild=True, verbose=args.verbose,
+                   vacuum=args.vacuum, presize=args.presize, input_sizes=sizes,
+                   pragmas=pragmas, jobs=args.jobs)
     else:
         # 有明確 inputs → 增量匯入 (除非 --rebuild)
+        sizes = {}
         for f in args.inputs:
-            if not os.path.exists(f):
+            sizes[f] = _stat_size(f)
+            if sizes[f] is None:
                 print(f'❌ 檔案不存在: {f}')
                 sys.exit(1)
         convert_v4(args.inputs, target_path,
                    rebuild=args.rebuild,
                    skip_finalize=args.skip_finalize,
-                   verbose=args.verbose)
+                   verbose=args.verbose,
+                   vacuum=args.vacuum,
+                   presize=args.presize,
+                   input_sizes=sizes,
+                   pragmas=pragmas,
+                   jobs=args.jobs)
 
 
 if __name__ == '__main__':
@@ -4,9 +4,16 @@
 """
 import sys
 import os
-sys.path.insert(0, os.path.dirname(__file__))
+import sqlite3
+import tempfile
+_TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+if _TEST_DIR not in sys.path:
+    sys.path.insert(0, _TEST_DIR)
 
-from convert import normalize_address_numbers, parse_address, chinese_numeral_to_int
+from convert import (
+    normalize_address_numbers, parse_address, chinese_numeral_to_int,
+    LandDataDB, LAND_COLUMNS,
+)
 
 
 def test_chinese_numeral():
@@ -38,6 +45,43 @@ def test_normalize():
     print('✅ 正規化 OK')
 
 
+def test_normalize_addresses():
+    """測試整欄批次正規化與逐筆 normalize_address 結果相同"""
+    from address_utils import normalize_address, normalize_addresses
+
+    # 相鄰項目的首尾刻意可接成中文數字/段號 (批次串接的 '\x00' 不可被正則跨越)
+    texts = [
+        '臺北市大安區仁愛路三段５３之３號二十一樓', '十', '號三樓', '二段', '12號',
+        '新北市汐止區湖前街１１０巷９７弄６之５號１４樓', '', None, '忠孝東路　四段',
+        '基隆市中正區新豐街486號之5      2樓', '五', '樓之二', '高雄市巿政路1號',
+    ]
+    expected = [normalize_address(t or '') for t in texts]
+    assert normalize_addresses(texts) == expected, normalize_addresses(texts)
+
+    # 字串本身含 '\x00' → 退回逐筆處理，筆數與結果不變
+    texts_nul = ['三民路２９巷\x00十號', '二樓'] + texts
+    expected = [normalize_address(t or '') for t in texts_nul]
+    assert normalize_addresses(texts_nul) == expected
+    assert normalize_addresses([]) == []
+    print('✅ 批次正規化 OK')
+
+
+def test_address_variants():
+    """測試搜尋變體: 前段變體 (LIKE 後備搜尋只取前 8 個) 須含實價登錄的原始寫法"""
+    from address_utils import generate_address_variants
+
+    cases = [
+        ('中山路3段12號', '中山路三段１２號'),
+        ('忠孝東路2段130號9樓之1', '忠孝東路二段１３０號九樓之１'),
+        ('仁愛路三段53之3號21樓', '仁愛路三段５３之３號二十一樓'),
+    ]
+    for query, stored in cases:
+        variants = generate_address_variants(query)
+        assert variants[0] == query, variants
+        assert stored in variants[:8], f'{query}: {variants}'
+    print('✅ 搜尋變體 OK')
+
+
 def test_parse_address():
     """測試地址解析"""
     cases = [
@@ -221,9 +265,56 @@ def test_ambiguous_districts():
     print('✅ 歧義區名消歧 OK')
 
 
+def _land_record(address, date, price):
+    """最小 land_transaction 記錄 (其餘欄位為 None)"""
+    rec = dict.fromkeys(LAND_COLUMNS)
+    rec.update(address=address, transaction_date=date, total_price=price)
+    return rec
+
+
+def test_insert_dedup_counts():
+    """測試重建匯入的去重計數 (同批次 / 跨批次重複 + UNIQUE 索引忽略的列)"""
+    a = _land_record('台北市大安區仁愛路三段53號', '1120105', 12000000)
+    b = _land_record('台北市大安區仁愛路三段55號', '1120105', 15000000)
+    c = _land_record('台北市中山區松江路25號', '1120301', 9000000)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'land_data.db')
+        db = LandDataDB(path)
+        db.open(rebuild=True)
+        db.BATCH_SIZE = 2
+        # a, b 同批次寫入；a 的同批次重複；c 進下一批；a / c 的跨批次重複
+        for rec in (a, b, dict(a), c, dict(a), dict(c)):
+            db.upsert_record(rec)
+        db.flush_all()
+        stats = db._stats
+        assert stats['inserted'] == 3, stats
+        assert stats['duplicated'] == 3, stats
+        db.close()
+
+        # 不載入 bloom 的增量寫入: 重複鍵全由 UNIQUE idx_dedup_key 忽略，改計為 duplicated
+        db = LandDataDB(path)
+        db.open(load_dedup=False)
+        db.fast_insert_records([dict(a), dict(b), _land_record('台北市中山區松江路27號', '1120301', 8000000)])
+        db.flush_all()
+        assert db._stats['inserted'] == 1, db._stats
+        assert db._stats['duplicated'] == 2, db._stats
+        db.close()
+
+        conn = sqlite3.connect(path)
+        rows, keys = conn.execute(
+            'SELECT COUNT(*), COUNT(DISTINCT dedup_key) FROM land_transaction').fetchone()
+        conn.close()
+        assert rows == keys == 4, (rows, keys)
+    print('✅ 匯入去重計數 OK')
+
+
 if __name__ == '__main__':
     test_chinese_numeral()
     test_normalize()
+    test_normalize_addresses()
+    test_address_variants()
     test_parse_address()
     test_ambiguous_districts()
+    test_insert_dedup_counts()
     print('\n🎉 所有測試通過!')
@@ -54,6 +54,10 @@ from address_utils import (
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DEFAULT_DB = os.path.join(SCRIPT_DIR, '..', 'db', 'land_data.db')
 
+# 顯示用地址清理: 全形 ASCII / 全形空白 → 半形 + 臺→台，單次 translate 完成
+_DISPLAY_ADDR_TABLE = str.maketrans({**{0xFF01 + i: 0x21 + i for i in range(94)},
+                                     0x3000: ' ', ord('臺'): '台'})
+
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # 篩選工具
@@ -73,6 +77,18 @@ SORT_OPTIONS = {
 # 搜尋引擎
 # ═══════════════════════════════════════════════════════════════════════════════
 
+# 搜尋結果回傳的欄位 (print_results / web format_tx_row 會用到的欄位)；
+# 略過去重鍵、都市計畫分區、編號等用不到的欄位，減少每列搬進 Python 的資料量
+RESULT_COLS = ', '.join([
+    'id', 'raw_district', 'transaction_type', 'address', 'transaction_date',
+    'floor_level', 'total_floors', 'building_type', 'main_use', 'main_material',
+    'build_date', 'building_area', 'rooms', 'halls', 'bathrooms', 'has_management',
+    'total_price', 'unit_price', 'parking_type', 'parking_area', 'parking_price',
+    'note', 'main_area', 'attached_area', 'balcony_area', 'elevator',
+    'county_city', 'district', 'village', 'street', 'lane', 'alley', 'number',
+    'floor', 'sub_number', 'community_name', 'lat', 'lng',
+])
+
 # 計算欄位 SQL（模組級常量，避免每次呼叫重建）
 _COMPUTED_COLS_SQL = """
     CASE WHEN building_area > 0
@@ -89,14 +105,35 @@ _COMPUTED_COLS_SQL = """
 """
 
 
+def _counted_sql(conn, by_district=False):
+    """
+    counted CTE 本體: addr_count 取自匯入時預先彙總的 address_counts (主鍵查表)，
+    免去每次查詢對候選列做 COUNT(*) OVER (PARTITION BY address) 的排序。
+    district 可能取自地址以外的欄位 (同一地址字串可分屬不同行政區)，address_counts 依
+    (address, district) 分組，以對齊視窗函式在候選集內的計數:
+      by_district=True  (候選集以 district = ? 篩選) → 該地址在該區的筆數
+      by_district=False                              → 該地址各區筆數加總
+    表不可用時 (見 _address_counts_ready) 退回視窗函式現算。
+    """
+    if not _address_counts_ready(conn):
+        return 'SELECT *, COUNT(*) OVER (PARTITION BY address) AS addr_count FROM base'
+    if by_district:
+        return ('SELECT base.*, COALESCE(ac.cnt, 1) AS addr_count FROM base '
+                'LEFT JOIN address_counts ac '
+                'ON ac.address = base.address AND ac.district = base.district')
+    return ('SELECT base.*, COALESCE((SELECT SUM(cnt) FROM address_counts ac '
+            'WHERE ac.address = base.address), 1) AS addr_count FROM base')
+
+
 def _build_filter_sql(filters, params):
     """建立篩選條件 SQL"""
     clauses = []
     btype = filters.get('building_types') or []
     if btype:
-        tc = ' OR '.join(['building_type LIKE ?' for _ in btype])
+        # instr 子字串比對：比 LIKE '%t%' 省去樣式解析，且不受 % / _ 萬用字元影響
+        tc = ' OR '.join(['instr(building_type, ?) > 0' for _ in btype])
         clauses.append(f'({tc})')
-        params.extend([f'%{t}%' for t in btype])
+        params.extend(btype)
 
     rooms = filters.get('rooms') or []
     if rooms:
@@ -126,7 +163,7 @@ def _build_filter_sql(filters, params):
     return ' AND '.join(clauses) if clauses else ''
 
 
-def search_structured(conn, parsed, filters, sort_by, limit):
+def search_structured(conn, parsed, filters, sort_by, limit, columns=RESULT_COLS):
     """策略 1: 結構化搜尋 (走索引, 最快)
 
     查詢策略 (由精確到寬鬆):
@@ -140,6 +177,8 @@ def search_structured(conn, parsed, filters, sort_by, limit):
         return []
 
     computed = _COMPUTED_COLS_SQL
+    counted_all = _counted_sql(conn)
+    counted_district = _counted_sql(conn, by_district=True)
     district = parsed.get('district')
     lane = parsed.get('lane', '')
     alley = parsed.get('alley', '')
@@ -206,17 +245,15 @@ def search_structured(conn, parsed, filters, sort_by, limit):
     for where_parts, base_params in levels:
         params = list(base_params)
         where_addr = ' AND '.join(where_parts)
+        counted = counted_district if 'district = ?' in where_parts else counted_all
 
         sql = f"""
         WITH base AS (
-            SELECT *, {computed}
+            SELECT {columns}, {computed}
             FROM land_transaction
             WHERE {where_addr} AND address != ''
         ),
-        counted AS (
-            SELECT *, COUNT(*) OVER (PARTITION BY address) AS addr_count
-            FROM base
-        )
+        counted AS ({counted})
         SELECT * FROM counted
         """
         filter_sql = _build_filter_sql(filters, params)
@@ -232,23 +269,21 @@ def search_structured(conn, parsed, filters, sort_by, limit):
     return []
 
 
-def search_fts(conn, query, filters, sort_by, limit):
+def search_fts(conn, query, filters, sort_by, limit, columns=RESULT_COLS):
     """策略 2: FTS5 全文搜尋"""
     computed = _COMPUTED_COLS_SQL
+    counted = _counted_sql(conn)
     order_sql = SORT_OPTIONS.get(sort_by, SORT_OPTIONS['date'])
     params = [f'"{query}"']
 
     sql = f"""
     WITH base AS (
-        SELECT t.*, {computed}
+        SELECT {columns}, {computed}
         FROM land_transaction t
         WHERE t.id IN (SELECT rowid FROM address_fts WHERE address MATCH ?)
           AND t.address != ''
     ),
-    counted AS (
-        SELECT *, COUNT(*) OVER (PARTITION BY address) AS addr_count
-        FROM base
-    )
+    counted AS ({counted})
     SELECT * FROM counted
     """
     filter_sql = _build_filter_sql(filters, params)
@@ -263,9 +298,10 @@ def search_fts(conn, query, filters, sort_by, limit):
         return []
 
 
-def search_like(conn, variants, filters, sort_by, limit):
+def search_like(conn, variants, filters, sort_by, limit, columns=RESULT_COLS):
     """策略 3: LIKE 後備搜尋 (限制變體數量避免全表掃描)"""
     computed = _COMPUTED_COLS_SQL
+    counted = _counted_sql(conn)
     order_sql = SORT_OPTIONS.get(sort_by, SORT_OPTIONS['date'])
 
     # 限制最多 8 個變體，避免大量 OR 導致效能問題
@@ -276,14 +312,11 @@ def search_like(conn, variants, filters, sort_by, limit):
 
     sql = f"""
     WITH base AS (
-        SELECT *, {computed}
+        SELECT {columns}, {computed}
         FROM land_transaction
         WHERE ({like_cond}) AND address != ''
     ),
-    counted AS (
-        SELECT *, COUNT(*) OVER (PARTITION BY address) AS addr_count
-        FROM base
-    )
+    counted AS ({counted})
     SELECT * FROM counted
     """
     filter_sql = _build_filter_sql(filters, params)
@@ -299,6 +332,30 @@ def search_like(conn, variants, filters, sort_by, limit):
 _local = threading.local()
 
 
+def _address_counts_ready(conn):
+    """
+    address_counts 是否可取代視窗函式: 須為 (address, district) 結構，且涵蓋 land_transaction 全部列。
+    address_counts 與 address_fts 於 finalize 同一交易更新 → 以 FTS 已索引的最大 rowid 為水位；
+    --skip-finalize 匯入的新列 id 大於水位、尚未彙總，此時現算以免低估筆數。
+    結果依連線快取 (per-thread)，僅在其他連線提交變更 (PRAGMA data_version 改變) 後重新檢查。
+    """
+    version = conn.execute('PRAGMA data_version').fetchone()[0]
+    cached = getattr(_local, 'counts_ready', None)
+    if cached is not None and cached[0] is conn and cached[1] == version:
+        return cached[2]
+    ready = False
+    cols = {row[1] for row in conn.execute('PRAGMA table_info(address_counts)')}
+    if 'district' in cols:
+        try:
+            ready = bool(conn.execute(
+                'SELECT COALESCE((SELECT max(id) FROM land_transaction), 0) '
+                '<= COALESCE((SELECT max(id) FROM address_fts_docsize), 0)').fetchone()[0])
+        except sqlite3.OperationalError:
+            pass  # 無 address_fts → 無水位可比對
+    _local.counts_ready = (conn, version, ready)
+    return ready
+
+
 def _get_cached_connection(db_path):
     """取得快取連線（per-thread，避免重複開關連線）"""
     real_path = os.path.realpath(db_path)
@@ -313,17 +370,20 @@ def _get_cached_connection(db_path):
             return conn
         except sqlite3.Error:
             conns.pop(real_path, None)
-    conn = sqlite3.connect(db_path)
+    # 查詢 SQL 依層級/篩選組合而異 → 放大 prepared statement 快取 (預設 128)
+    conn = sqlite3.connect(db_path, cached_statements=512)
     conn.row_factory = sqlite3.Row
     conn.execute('PRAGMA cache_size=-50000')   # 50MB cache
     conn.execute('PRAGMA mmap_size=268435456') # 256MB mmap
+    conn.execute('PRAGMA temp_store=MEMORY')   # 視窗函式 / ORDER BY 的暫存 B-tree 留在記憶體
     conn.execute('PRAGMA query_only=ON')       # 唯讀提示，避免 journal 開銷
     conns[real_path] = conn
     return conn
 
 
 def search_address(address, db_path=DEFAULT_DB, filters=None,
-                   sort_by='date', limit=200, show_sql=False, conn=None):
+                   sort_by='date', limit=200, show_sql=False, conn=None,
+                   columns=None):
     """
     主搜尋函式。依序嘗試:
       1. 結構化搜尋 (解析後欄位, 走索引)
@@ -332,12 +392,14 @@ def search_address(address, db_path=DEFAULT_DB, filters=None,
 
     Args:
         conn: 可選的已開啟連線 (避免重複開關)
+        columns: 回傳的 land_transaction 欄位 SQL；None = RESULT_COLS，'*' = 全部欄位 (CSV 匯出用)
     """
     if not os.path.exists(db_path):
         raise FileNotFoundError(f"找不到資料庫: {db_path}")
 
     filters = filters or {}
     parsed = parse_query(address)
+    columns = columns or RESULT_COLS
 
     own_conn = conn is None
     if own_conn:
@@ -345,23 +407,24 @@ def search_address(address, db_path=DEFAULT_DB, filters=None,
 
     method = ''
     rows = []
+    variants = None
 
     try:
         # 策略 1: 結構化搜尋
         if parsed.get('street'):
-            rows = search_structured(conn, parsed, filters, sort_by, limit)
+            rows = search_structured(conn, parsed, filters, sort_by, limit, columns)
             method = '結構化索引'
 
         # 策略 2: FTS5
         if not rows:
             normalized = normalize_address(address, for_query=True)
-            rows = search_fts(conn, normalized, filters, sort_by, limit)
+            rows = search_fts(conn, normalized, filters, sort_by, limit, columns)
             method = 'FTS5 全文'
 
         # 策略 3: LIKE 變體
         if not rows:
             variants = generate_address_variants(address)
-            rows = search_like(conn, variants, filters, sort_by, limit)
+            rows = search_like(conn, variants, filters, sort_by, limit, columns)
             method = 'LIKE 變體'
 
     except sqlite3.Error:
@@ -378,7 +441,7 @@ def search_address(address, db_path=DEFAULT_DB, filters=None,
 
     return {
         'query': address,
-        'variants': generate_address_variants(address),
+        'variants': variants if variants is not None else generate_address_variants(address),
         'parsed': parsed,
         'method': method,
         'filters': filters,
@@ -451,7 +514,7 @@ def format_address(r):
     if not street:
         # fallback: 清理 raw address
         raw = r.get('address') or ''
-        raw = fullwidth_to_halfwidth(raw).replace('臺', '台')
+        raw = raw.translate(_DISPLAY_ADDR_TABLE)
         return raw[:35]
 
     parts = [street]
@@ -686,6 +749,7 @@ def main():
         result = search_address(
             args.address, db_path=args.db, filters=filters,
             sort_by=args.sort, limit=args.limit, show_sql=args.show_sql,
+            columns='*' if args.export else None,  # 匯出 CSV 保留所有欄位
         )
         print_results(result, show_variants=not args.no_variants)
         if args.export:
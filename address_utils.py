@@ -14,6 +14,8 @@ address_utils.py — 台灣地址正規化 / 解析共用模組
 """
 
 import re
+import unicodedata
+from functools import lru_cache
 
 # ============================================================
 # 常數
@@ -58,36 +60,55 @@ ARABIC_TO_CN_SECTION = {
 # 全形半形轉換
 # ============================================================
 
+# 全形 ASCII 區間 (U+FF01~FF5E) + 全形空白 → 半形，單次 str.translate 完成
+_FULLWIDTH_TABLE = {0xFF01 + i: 0x21 + i for i in range(94)}
+_FULLWIDTH_TABLE[0x3000] = ' '
+
+# 正規化用合併表: 全形→半形 + 變體字修正 (臺→台, \u5DFF→市)
+_NORMALIZE_TABLE = {**_FULLWIDTH_TABLE, ord('\u5DFF'): '市', ord('臺'): '台'}
+
+# 縣市擷取用: 全形→半形 + 臺→台，取代 translate 後再 .replace 的兩趟掃描
+_FULLWIDTH_TAI_TABLE = {**_FULLWIDTH_TABLE, ord('臺'): '台'}
+
+
+_HALF_TO_FULL_DIGITS = str.maketrans(HALFWIDTH_DIGITS, FULLWIDTH_DIGITS)
+
+
+def _normalize_chars(text: str) -> str:
+    """
+    套用 _NORMALIZE_TABLE (全形→半形 + 變體字修正)。
+    全形 ASCII / 全形空白皆有 NFKC 相容分解 → NFKC 穩定的字串必不含這些字元，
+    以 C 層的 is_normalized 快速檢查後只需處理兩個變體字，省去逐字查表。
+    (不直接改用 NFKC 正規化: 其涵蓋範圍較廣，會改變既有去重鍵)
+    """
+    if unicodedata.is_normalized('NFKC', text):
+        if '臺' in text:
+            text = text.replace('臺', '台')
+        if '\u5DFF' in text:
+            text = text.replace('\u5DFF', '市')
+        return text
+    return text.translate(_NORMALIZE_TABLE)
+
+
 def fullwidth_to_halfwidth(text: str) -> str:
     """全形字元轉半形（涵蓋 ASCII 全形區間 + 全形空白）"""
-    result = []
-    for ch in text:
-        code = ord(ch)
-        if 0xFF01 <= code <= 0xFF5E:
-            result.append(chr(code - 0xFEE0))
-        elif code == 0x3000:
-            result.append(' ')
-        else:
-            result.append(ch)
-    return ''.join(result)
+    return text.translate(_FULLWIDTH_TABLE)
 
 
 def halfwidth_to_fullwidth(text: str) -> str:
     """半形數字轉全形"""
-    result = []
-    for ch in text:
-        idx = HALFWIDTH_DIGITS.find(ch)
-        result.append(FULLWIDTH_DIGITS[idx] if idx >= 0 else ch)
-    return ''.join(result)
+    return text.translate(_HALF_TO_FULL_DIGITS)
 
 
 # ============================================================
 # 中文數字 ↔ 阿拉伯數字
 # ============================================================
 
+@lru_cache(maxsize=4096)
 def chinese_numeral_to_int(text: str):
     """
     中文數字字串轉為整數。
+    (輸入多為「十二」「三」等少數短字串 → 以 lru_cache 快取結果)
 
     支援:
       - 阿拉伯數字直接轉 (e.g. '123')
@@ -138,19 +159,8 @@ def chinese_numeral_to_int(text: str):
     return None
 
 
-def arabic_to_chinese(n: int) -> list:
-    """
-    阿拉伯數字轉中文數字（回傳所有變體字串列表）。
-    用於產生搜尋變體。
-    """
-    if n <= 0 or n > 9999:
-        return []
-    results = set()
-
-    # 位置式: 123 → 一二三
-    results.add(''.join(CN_DIGIT_MAP[int(d)] for d in str(n)))
-
-    # 標準中文
+def _standard_chinese(n: int) -> str:
+    """阿拉伯數字 (1~9999) 轉標準中文寫法，如 21 → 二十一、130 → 一百三十"""
     parts = []
     tens = (n % 100) // 10
     units = n % 10
@@ -171,7 +181,23 @@ def arabic_to_chinese(n: int) -> list:
         parts.append('零')
     if units:
         parts.append(CN_DIGIT_MAP[units])
-    results.add(''.join(parts))
+    return ''.join(parts)
+
+
+def arabic_to_chinese(n: int) -> list:
+    """
+    阿拉伯數字轉中文數字（回傳所有變體字串列表）。
+    用於產生搜尋變體。
+    """
+    if n <= 0 or n > 9999:
+        return []
+    results = set()
+
+    # 位置式: 123 → 一二三
+    results.add(''.join(CN_DIGIT_MAP[int(d)] for d in str(n)))
+
+    # 標準中文
+    results.add(_standard_chinese(n))
 
     # 十幾 的變體
     if 10 <= n <= 19:
@@ -186,46 +212,46 @@ def arabic_to_chinese(n: int) -> list:
 # ============================================================
 
 def generate_number_variants(num_str):
-    """產生數字的所有表示變體（半形/全形/中文）"""
-    variants = set()
+    """
+    產生數字的所有表示變體（半形/全形/中文）。
+    順序固定: 半形 → 全形 → 中文各寫法 (依字典序) → 廿X。
+    """
     normalized = fullwidth_to_halfwidth(num_str)
     try:
         n = int(normalized)
     except (ValueError, TypeError):
         n = None
-    variants.add(normalized)
-    variants.add(halfwidth_to_fullwidth(normalized))
+    variants = [normalized, halfwidth_to_fullwidth(normalized)]
     if n is not None:
-        for cn in arabic_to_chinese(n):
-            variants.add(cn)
+        variants.extend(sorted(arabic_to_chinese(n)))
         if 20 <= n <= 29:
-            variants.add('廿' + (CN_DIGIT_MAP[n % 10] if n % 10 else ''))
-    return [v for v in variants if v]
+            variants.append('廿' + (CN_DIGIT_MAP[n % 10] if n % 10 else ''))
+    return [v for v in dict.fromkeys(variants) if v]
+
+
+_RE_DIGIT_RUNS = re.compile(r'(\d+|[^\d]+)')
+_RE_CN_ADDR_NUM = re.compile(r'([零〇一兩二三四五六七八九十百千]+)(?=[樓層號巷弄段之]|F(?:\d|$))')
 
 
 def parse_address_tokens(address):
     """解析地址字串為 token 列表 (用於產生搜尋變體)"""
     normalized = fullwidth_to_halfwidth(address)
     tokens = []
-    pattern = re.compile(r'(\d+|[^\d]+)')
     raw_tokens = []
-    for m in pattern.finditer(normalized):
+    for m in _RE_DIGIT_RUNS.finditer(normalized):
         val = m.group()
         if val.isdigit():
             raw_tokens.append({'type': 'num', 'val': val})
         else:
             raw_tokens.append({'type': 'text', 'val': val})
 
-    CN_ADDR_UNIT = r'(?=[樓層號巷弄段之]|F(?:\d|$))'
-    CN_NUM_PAT = re.compile(r'([零〇一兩二三四五六七八九十百千]+)' + CN_ADDR_UNIT)
-
     for tok in raw_tokens:
         if tok['type'] != 'text':
             tokens.append(tok)
             continue
         text = tok['val']
         pos = 0
-        for m in CN_NUM_PAT.finditer(text):
+        for m in _RE_CN_ADDR_NUM.finditer(text):
             start, end = m.start(), m.end()
             cn_str = m.group(1)
             arabic_val = chinese_numeral_to_int(cn_str)
@@ -242,31 +268,71 @@ def parse_address_tokens(address):
 
 
 def generate_address_variants(address):
-    """產生地址搜尋變體（全形/半形/中文數字排列組合）"""
-    from itertools import product
+    """
+    產生地址搜尋變體（全形/半形/中文數字寫法），依優先序排列 (見 _address_variants)。
+    結果以 lru_cache 快取 (批次搜尋常有重複地址)；每次回傳新的 list，呼叫端可自由修改。
+    """
+    return list(_address_variants(address))
 
+
+MAX_ADDRESS_VARIANTS = 16  # 每個地址最多產生的搜尋變體數
+
+
+@lru_cache(maxsize=4096)
+def _address_variants(address: str) -> tuple:
+    """
+    依優先序產生至多 MAX_ADDRESS_VARIANTS 個變體 (不做各 token 的笛卡兒積):
+      原字串 → 實價登錄寫法 → 數字全形版 → 數字一律半形阿拉伯 → 數字一律全形 →
+      以全半形阿拉伯為底、每次只替換一個數字 token 的寫法。
+    實價登錄寫法: 段/樓/層前的數字用標準中文、其餘用全形 (如 中山路三段１２號五樓)，
+    需同時替換多個 token，單一替換無法產生，故明列於前。
+    """
     tokens = parse_address_tokens(address)
-    candidates = []
+    options = []  # 各 token 的候選寫法，[0] 為半形阿拉伯、[1] 為全形 (純文字 token 僅一種)
+    lvr = []
+    for i, tok in enumerate(tokens):
+        if tok['type'] in ('num', 'cn_num'):
+            digits = str(tok['arabic']) if tok['type'] == 'cn_num' else tok['val']
+            n = int(digits)
+            nxt = tokens[i + 1]['val'][:1] if i + 1 < len(tokens) else ''
+            if nxt in ('段', '樓', '層') and 0 < n <= 9999:
+                lvr.append(_standard_chinese(n))
+            else:
+                lvr.append(halfwidth_to_fullwidth(digits))
+        else:
+            lvr.append(tok['val'])
     for tok in tokens:
         if tok['type'] == 'num':
-            candidates.append(generate_number_variants(tok['val']))
+            options.append(generate_number_variants(tok['val']))
         elif tok['type'] == 'cn_num':
-            vs = set()
-            vs.add(tok['val'])
-            vs.add(str(tok['arabic']))
-            vs.add(halfwidth_to_fullwidth(str(tok['arabic'])))
-            for cn in arabic_to_chinese(tok['arabic']):
-                vs.add(cn)
-            candidates.append(list(vs))
+            arabic = str(tok['arabic'])
+            opts = [arabic, halfwidth_to_fullwidth(arabic), tok['val']]
+            opts.extend(sorted(arabic_to_chinese(tok['arabic'])))
+            options.append(list(dict.fromkeys(opts)))
         else:
-            candidates.append([tok['val']])
-
-    all_v = set()
-    for combo in product(*candidates):
-        all_v.add(''.join(combo))
-    all_v.add(address.strip())
-    all_v.add(halfwidth_to_fullwidth(fullwidth_to_halfwidth(address.strip())))
-    return sorted(all_v)
+            options.append([tok['val']])
+
+    base = [opts[0] for opts in options]
+
+    def candidates():
+        stripped = address.strip()
+        yield stripped
+        yield ''.join(lvr)
+        yield halfwidth_to_fullwidth(fullwidth_to_halfwidth(stripped))
+        yield ''.join(base)
+        yield ''.join(opts[1] if len(opts) > 1 else opts[0] for opts in options)
+        for i, opts in enumerate(options):
+            for v in opts[1:]:
+                parts = base.copy()
+                parts[i] = v
+                yield ''.join(parts)
+
+    seen = {}
+    for v in candidates():
+        seen[v] = None
+        if len(seen) >= MAX_ADDRESS_VARIANTS:
+            break
+    return tuple(seen)
 
 
 # ============================================================
@@ -300,6 +366,25 @@ def parse_range(s):
 # 預設地址後綴 pattern（樓/層/號/巷/弄/之/鄰）
 _ADDR_SUFFIXES_BASE = '樓|層|號|巷|弄|之|鄰'
 _ADDR_SUFFIXES_QUERY = '樓|層|號|巷|弄|之|鄰|F|f'  # 查詢時額外支援 F/f
+_RE_CN_NUM_SUFFIX = re.compile(rf'([{CHINESE_NUM_CHARS}]+)({_ADDR_SUFFIXES_BASE})')
+_RE_CN_NUM_SUFFIX_QUERY = re.compile(rf'([{CHINESE_NUM_CHARS}]+)({_ADDR_SUFFIXES_QUERY})')
+_RE_SECTION_NUM = re.compile(r'(\d+)段')
+
+
+def _repl_cn_num(m):
+    num = chinese_numeral_to_int(m.group(1))
+    if num is not None:
+        return f'{num}{m.group(2)}'
+    return m.group(0)
+
+
+def _repl_section(m):
+    """將數字段統一轉為中文段 (e.g. '3段' → '三段')"""
+    n = m.group(1)
+    cn = ARABIC_TO_CN_SECTION.get(n) if len(n) <= 2 else None
+    if cn:
+        return f'{cn}段'
+    return m.group(0)
 
 
 def normalize_address(text: str, *, for_query: bool = False) -> str:
@@ -319,31 +404,27 @@ def normalize_address(text: str, *, for_query: bool = False) -> str:
     if not text:
         return text or ''
 
-    text = fullwidth_to_halfwidth(text.strip() if for_query else text)
-    text = text.replace('\u5DFF', '市')
-    text = text.replace('臺', '台')
+    text = _normalize_chars(text.strip() if for_query else text)
 
-    suffixes = _ADDR_SUFFIXES_QUERY if for_query else _ADDR_SUFFIXES_BASE
-    pattern = re.compile(rf'([{CHINESE_NUM_CHARS}]+)({suffixes})')
+    pattern = _RE_CN_NUM_SUFFIX_QUERY if for_query else _RE_CN_NUM_SUFFIX
+    text = pattern.sub(_repl_cn_num, text)
+    return _RE_SECTION_NUM.sub(_repl_section, text)
 
-    def _replace(m):
-        num = chinese_numeral_to_int(m.group(1))
-        if num is not None:
-            return f'{num}{m.group(2)}'
-        return m.group(0)
 
-    text = pattern.sub(_replace, text)
-
-    # 將數字段統一轉為中文段 (e.g. '3段' → '三段')
-    def _repl_section(m):
-        n = m.group(1)
-        cn = ARABIC_TO_CN_SECTION.get(n) if len(n) <= 2 else None
-        if cn:
-            return f'{cn}段'
-        return m.group(0)
+def normalize_addresses(texts) -> list:
+    """
+    整欄批次版 normalize_address: 結果與逐筆呼叫相同。
 
-    text = re.sub(r'(\d+)段', _repl_section, text)
-    return text
+    以 '\\x00' 串接整欄後只做一次 translate + 兩次正則替換再切回，
+    省去每筆的函式呼叫與 C 層進出開銷。各正則皆不跨越 '\\x00'，
+    故批次結果逐筆等價；若有字串本身含 '\\x00' 則退回逐筆處理。
+    """
+    texts = [t or '' for t in texts]
+    joined = '\x00'.join(texts)
+    if joined.count('\x00') != len(texts) - 1:
+        return [normalize_address(t) for t in texts]
+    joined = _RE_CN_NUM_SUFFIX.sub(_repl_cn_num, _normalize_chars(joined))
+    return _RE_SECTION_NUM.sub(_repl_section, joined).split('\x00')
 
 
 # ============================================================
@@ -569,7 +650,7 @@ _RE_QUERY_FLOOR = re.compile(r'^[,，]?\s*(\d+)(?:樓|層|[Ff])')
 _RE_QUERY_SUB = re.compile(r'^之(\d+)')
 
 
-def parse_address(raw_address, district_col='', city_hint=''):
+def parse_address(raw_address, district_col='', city_hint='', normalized=False):
     """
     解析台灣地址為各組成部分。
 
@@ -577,6 +658,8 @@ def parse_address(raw_address, district_col='', city_hint=''):
         raw_address: 原始地址字串
         district_col: CSV 中獨立的鄉鎮市區欄值（可選，用作 fallback）
         city_hint: 已知縣市（如來自 city_code），用於歧義區名消歧
+        normalized: True 表示 raw_address 已是 normalize_address(去頭尾空白) 的結果，
+                    略過正規化 (供整欄批次正規化後呼叫)
 
     Returns:
         dict with keys: county_city, district, village, neighborhood,
@@ -592,7 +675,7 @@ def parse_address(raw_address, district_col='', city_hint=''):
     if '地號' in raw_address:
         return empty
 
-    addr = normalize_address(raw_address.strip())
+    addr = raw_address if normalized else normalize_address(raw_address.strip())
     result = dict(empty)
 
     # 縣市
@@ -829,7 +912,7 @@ def normalize_city_name(city: str) -> str:
 
 def extract_city(addr: str) -> str:
     """從地址提取縣市名稱（已正規化為「台」）"""
-    s = fullwidth_to_halfwidth(str(addr).strip()).replace('臺', '台')
+    s = str(addr).strip().translate(_FULLWIDTH_TAI_TABLE)
     m = CITY_PATTERN.match(s)
     if m:
         return OLD_TO_NEW.get(m.group(1), m.group(1))
@@ -838,7 +921,7 @@ def extract_city(addr: str) -> str:
 
 def extract_district_name(addr: str) -> str:
     """從地址提取鄉鎮市區名稱（去除縣市前綴後取區名）"""
-    s = fullwidth_to_halfwidth(str(addr).strip()).replace('臺', '台')
+    s = str(addr).strip().translate(_FULLWIDTH_TAI_TABLE)
     m = CITY_PATTERN.match(s)
     if m:
         s = s[m.end():]
@@ -868,6 +951,28 @@ def get_591_regionids(addr: str) -> list:
     return list(DEFAULT_591_REGION_ORDER)
 
 
+_RE_DISTRICT_PREFIX = re.compile(r'^[\u4e00-\u9fff]{1,3}?[區鎮鄉市]')
+_RE_VILLAGE_NEIGHBOR = re.compile(r'[\u4e00-\u9fff]*里\d*鄰?')
+_RE_NEIGHBOR_ANY = re.compile(r'\d+鄰')
+_RE_WHITESPACE = re.compile(r'\s+')
+
+# strip_to_road_number 依序套用的清除規則 (里鄰 → 樓層 → 棟號 → 旁/之/共 → 空白)
+_ROAD_NUMBER_STRIP_RES = (_RE_VILLAGE_NEIGHBOR, _RE_NEIGHBOR_ANY) + tuple(re.compile(p) for p in (
+    # 去樓層
+    r'[,，\s]*(地下)?[\d]+樓.*$',
+    r'[,，\s]*(地下)?(十|二十|三十)?[一二三四五六七八九十百]+樓.*$',
+    r'\s*\d+F$',
+    r'\s*[A-Za-z]\d*[-]\d+F$',
+    # 去棟號
+    r'\s*[A-Za-z]\d*棟.*$',
+    r'\s+[A-Za-z]\d+[-][A-Za-z]?\d*F?$',
+    # 去旁/之/共
+    r'旁.*$',
+    r'之\d+$',
+    r'共\d+筆$',
+)) + (_RE_WHITESPACE,)
+
+
 def strip_city_district(addr: str) -> str:
     """去除縣市和鄉鎮市區，僅保留路段+門牌"""
     s = fullwidth_to_halfwidth(str(addr).strip())
@@ -875,7 +980,7 @@ def strip_city_district(addr: str) -> str:
     m = CITY_PATTERN.match(s_match)
     if m:
         s = s[m.end():]
-    s = re.sub(r'^[\u4e00-\u9fff]{1,3}?[區鎮鄉市]', '', s)
+    s = _RE_DISTRICT_PREFIX.sub('', s)
     return s.strip()
 
 
@@ -885,22 +990,8 @@ def strip_to_road_number(addr: str) -> str:
     例如：'臺中市北區三民路三段100號8樓' → '三民路三段100號'
     """
     s = strip_city_district(str(addr))
-    # 去里鄰
-    s = re.sub(r'[\u4e00-\u9fff]*里\d*鄰?', '', s)
-    s = re.sub(r'\d+鄰', '', s)
-    # 去樓層
-    s = re.sub(r'[,，\s]*(地下)?[\d]+樓.*$', '', s)
-    s = re.sub(r'[,，\s]*(地下)?(十|二十|三十)?[一二三四五六七八九十百]+樓.*$', '', s)
-    s = re.sub(r'\s*\d+F$', '', s)
-    s = re.sub(r'\s*[A-Za-z]\d*[-]\d+F$', '', s)
-    # 去棟號
-    s = re.sub(r'\s*[A-Za-z]\d*棟.*$', '', s)
-    s = re.sub(r'\s+[A-Za-z]\d+[-][A-Za-z]?\d*F?$', '', s)
-    # 去旁/之/共
-    s = re.sub(r'旁.*$', '', s)
-    s = re.sub(r'之\d+$', '', s)
-    s = re.sub(r'共\d+筆$', '', s)
-    s = re.sub(r'\s+', '', s)
+    for pattern in _ROAD_NUMBER_STRIP_RES:
+        s = pattern.sub('', s)
     return s.strip()
 
 
@@ -924,15 +1015,20 @@ def extract_road_alley(addr: str) -> str:
     """提取路段+巷弄（不含門牌號），例如 '三民路29巷' """
     s = strip_city_district(addr)
     # 去里鄰
-    s = re.sub(r'[\u4e00-\u9fff]*里\d*鄰?', '', s)
-    s = re.sub(r'\d+鄰', '', s)
+    s = _RE_VILLAGE_NEIGHBOR.sub('', s)
+    s = _RE_NEIGHBOR_ANY.sub('', s)
     m = _RE_EXTRACT_ROAD_ALLEY.search(s)
     return m.group(1) if m else ''
 
 
+_RE_ROAD_NUMBER = re.compile(r'(.*?\d+號)')
+_RE_LANE_HOUSE_NUM = re.compile(r'巷(\d+)號')
+_RE_HOUSE_NUM = re.compile(r'(\d+)號')
+
+
 def extract_road_number(addr: str) -> str:
     """提取到「XX號」為止的字串，例如 '三民路29巷6號' """
-    m = re.search(r'(.*?\d+號)', addr)
+    m = _RE_ROAD_NUMBER.search(addr)
     return m.group(1) if m else addr
 
 
@@ -940,11 +1036,11 @@ def extract_house_number(addr: str) -> int:
     """從地址提取門牌號碼（整數）。優先取巷弄號，否則取路號。回傳 -1 表示無號。"""
     s = fullwidth_to_halfwidth(str(addr))
     # 先嘗試巷弄號：如 '29巷5號' 取 5
-    m = re.search(r'巷(\d+)號', s)
+    m = _RE_LANE_HOUSE_NUM.search(s)
     if m:
         return int(m.group(1))
     # 再嘗試一般號碼
-    m = re.search(r'(\d+)號', s)
+    m = _RE_HOUSE_NUM.search(s)
     if m:
         return int(m.group(1))
     return -1
@@ -957,5 +1053,5 @@ def normalize_community_name(name: str) -> str:
     s = name.strip()
     s = fullwidth_to_halfwidth(s)
     s = s.upper()
-    s = re.sub(r'\s+', ' ', s).strip()
+    s = _RE_WHITESPACE.sub(' ', s).strip()
     return s
@@ -127,38 +127,61 @@ def mark_period_done(cur, city: str, period: str, count: int):
     )
 
 
-def insert_records(cur, city: str, records: list) -> int:
-    inserted = 0
-    for r in records:
-        try:
-            cur.execute(
-                """INSERT OR IGNORE INTO transactions
+_INSERT_SQL = """INSERT OR IGNORE INTO transactions
                    (city, town, address, build_type, community,
                     date_str, floor, area, total_price, unit_price,
                     lat, lon, sq, raw_json)
-                   VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)""",
-                (
-                    city,
-                    r.get("town", ""),
-                    r.get("a", ""),
-                    r.get("b", ""),
-                    r.get("bn", ""),
-                    r.get("e", ""),
-                    r.get("f", ""),
-                    r.get("s", ""),
-                    r.get("p", ""),
-                    r.get("v", ""),
-                    r.get("lat"),
-                    r.get("lon"),
-                    r.get("sq", ""),
-                    json.dumps(r, ensure_ascii=False),
-                ),
-            )
-            if cur.rowcount > 0:
-                inserted += 1
-        except sqlite3.Error as e:
-            logger.debug(f"insert skip: {e}")
-    return inserted
+                   VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)"""
+_INSERT_CHUNK = 10000  # 每次 executemany 的列數
+
+
+def _record_params(city: str, r: dict) -> tuple:
+    return (
+        city,
+        r.get("town", ""),
+        r.get("a", ""),
+        r.get("b", ""),
+        r.get("bn", ""),
+        r.get("e", ""),
+        r.get("f", ""),
+        r.get("s", ""),
+        r.get("p", ""),
+        r.get("v", ""),
+        r.get("lat"),
+        r.get("lon"),
+        r.get("sq", ""),
+        json.dumps(r, ensure_ascii=False),
+    )
+
+
+def insert_records(cur, city: str, records: list) -> int:
+    """
+    批次寫入一段期間的交易紀錄，回傳實際新增筆數。
+    以 executemany 每 _INSERT_CHUNK 列送一次 (語句只準備一次)；
+    新增數由連線的 total_changes 差值取得 (OR IGNORE 略過的列不計)。
+    某批含無法綁定的值時，該批撤回後退回逐列寫入並略過壞列。
+    寫入在呼叫端的交易內進行 (無交易時先 BEGIN)：交易外的 SAVEPOINT 會自成交易、
+    RELEASE 即提交，各批須與 mark_period_done 由呼叫端同一次 commit 提交。
+    """
+    conn = cur.connection
+    before = conn.total_changes
+    if not conn.in_transaction:
+        cur.execute("BEGIN")
+    for i in range(0, len(records), _INSERT_CHUNK):
+        params = [_record_params(city, r) for r in records[i:i + _INSERT_CHUNK]]
+        cur.execute("SAVEPOINT insert_chunk")
+        try:
+            cur.executemany(_INSERT_SQL, params)
+        except sqlite3.Error:
+            # 撤回本批已寫入的部分 (sq 為 NULL 的列不受 UNIQUE 保護)，再逐列重試
+            cur.execute("ROLLBACK TO insert_chunk")
+            for p in params:
+                try:
+                    cur.execute(_INSERT_SQL, p)
+                except sqlite3.Error as e:
+                    logger.debug(f"insert skip: {e}")
+        cur.execute("RELEASE insert_chunk")
+    return conn.total_changes - before
 
 
 # ---------------------------------------------------------------------------
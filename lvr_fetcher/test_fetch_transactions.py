@@ -0,0 +1,31 @@
+import os
+import tempfile
+
+from lvr_fetcher.fetch_transactions import (
+    init_db, insert_records, is_period_done, mark_period_done,
+)
+
+# 測試一段期間的寫入與完成標記同屬一個交易
+
+
+def test_insert_records_rolls_back_with_period():
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = init_db(os.path.join(tmp, "transactions.db"))
+        cur = conn.cursor()
+        # sq 為 NULL 的列不受 UNIQUE 保護，重跑時若已先提交會重複寫入
+        records = [{"town": "中正區", "a": f"中正路{i}號", "sq": None} for i in range(3)]
+
+        inserted = insert_records(cur, "C", records)
+        mark_period_done(cur, "C", "112-01", len(records))
+        assert inserted == 3
+        conn.rollback()  # 模擬 commit 前中斷
+
+        assert cur.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == 0
+        assert not is_period_done(cur, "C", "112-01")
+
+        insert_records(cur, "C", records)
+        mark_period_done(cur, "C", "112-01", len(records))
+        conn.commit()
+        assert cur.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == 3
+        assert is_period_done(cur, "C", "112-01")
+        conn.close()
@@ -120,8 +120,9 @@ def build_filter_where(filters: dict, params: list) -> list:
     if filters.get("building_types"):
         like_parts = []
         for bt in filters["building_types"]:
-            like_parts.append("building_type LIKE ?")
-            params.append(f"%{bt}%")
+            # instr 子字串比對，避免 LIKE 樣式解析與萬用字元
+            like_parts.append("instr(building_type, ?) > 0")
+            params.append(bt)
         clauses.append("(" + " OR ".join(like_parts) + ")")
     if filters.get("rooms"):
         placeholders = ",".join(["?"] * len(filters["rooms"]))